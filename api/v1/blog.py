@@ -63,7 +63,8 @@ async def list_most_recent_blogs(
         start=start or 0,
         stop=stop or 50,
         sort_field="date_created",
-        sort_order=-1  # descending
+        sort_order=-1,  # descending
+        include_total=True
     )
 
     detail_msg = f"Fetched blogs {start} to {stop} sorted by most recent"
@@ -111,13 +112,13 @@ async def list_blogs(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'stop' cannot be less than 'start'.")
         
         # Pass filters to the service layer
-        items = await retrieve_blogs(filters=parsed_filters, start=start, stop=stop)
+        items = await retrieve_blogs(filters=parsed_filters, start=start, stop=stop, include_total=True)
         return APIResponse(status_code=200, data=items, detail="Fetched successfully")
 
     # Case 3: Default (no params)
     else:
         # Pass filters to the service layer
-        items = await retrieve_blogs(filters=parsed_filters, start=0, stop=100)
+        items = await retrieve_blogs(filters=parsed_filters, start=0, stop=100, include_total=True)
         detail_msg = "Fetched first 100 records successfully"
         if parsed_filters:
             # If filters were applied, adjust the detail message
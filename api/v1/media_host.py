@@ -2,12 +2,13 @@ from bson import ObjectId
 from fastapi.responses import StreamingResponse
 from celery_worker import celery_app
 from typing import TypeVar, Generic, Union
-from repositories.media_host import delete_media, save_video_to_mongodb
+from repositories.media_host import delete_gridfs_file, delete_media, hash_upload, save_asset_hash, stream_upload_to_gridfs
+from services.media_service import find_duplicate_media, save_video_once, upload_image_once
 from schemas.imports import CategoryNameEnum
 from schemas.response_schema import APIResponse
 from schemas.media_host import ImageUploadResponse, MediaBase, VideoUploadResponse
 from security.auth import verify_admin_token
-from services.image_host import generate_media_json, upload_to_freeimage_service
+from services.image_host import generate_media_json
 from fastapi import (
     Depends,
     FastAPI,
@@ -70,7 +71,7 @@ async def upload_media(
     # Determine if the uploaded file is an image
     if content_type.startswith("image/"):
         # Upload to FreeImage.Host
-        image_url = await upload_to_freeimage_service(file)
+        image_url = await upload_image_once(file)
 
         return APIResponse(
             status_code=201,
@@ -83,7 +84,7 @@ async def upload_media(
 
     # Determine if it’s a video
     elif content_type.startswith("video/"):
-        video_url = await save_video_to_mongodb(file)
+        video_url = await save_video_once(file)
         full_url = str(request.base_url).rstrip("/") + video_url
 
         return APIResponse(
@@ -146,18 +147,30 @@ async def upload_new_content_with_a_category(
     - Videos → stored in MongoDB GridFS
     """
 
-    file_bytes = await file.read()
-
     # Get filename and content type
     filename = file.filename
     content_type = file.content_type
+    request_url = str(request.base_url).rstrip("/")
     media = MediaBase(mediaType="image",category=category)
+
+    # Content that was uploaded before is answered straight away, without a job
+    content_hash, size = await hash_upload(file)
+    duplicate = await find_duplicate_media(content_hash, category, filename, request_url)
+    if duplicate is not None:
+        return APIResponse(
+            status_code=200,
+            data=duplicate,
+            detail="Media already uploaded; existing item returned"
+        )
+    # Uploads are streamed into GridFS here and the worker only gets the file id,
+    # so neither this process nor the broker ever holds the whole file
     # Determine if the uploaded file is an image
     if content_type.startswith("image/"):
-        # Upload to FreeImage.Host
+        # Staged in GridFS; the worker uploads it to FreeImage.Host and removes it
         
         media.mediaType="image"
-        job_id = celery_app.send_task(name= "celery_worker.create_media_task",args=[media.model_dump(), file_bytes, filename, content_type])
+        file_id = await stream_upload_to_gridfs(file, metadata={"staged": True})
+        job_id = celery_app.send_task(name= "celery_worker.create_media_task",args=[media.model_dump(), str(file_id), filename, content_type, content_hash, size])
          
         return APIResponse(
             status_code=201,
@@ -168,8 +181,16 @@ async def upload_new_content_with_a_category(
     # Determine if it’s a video
     elif content_type.startswith("video/"):
         media.mediaType="video"
-        media.requestUrl = str(request.base_url).rstrip("/") 
-        job_id = celery_app.send_task(name= "celery_worker.create_media_task",args=[media.model_dump(), file_bytes, filename, content_type])
+        media.requestUrl = request_url
+        # Written straight to its final GridFS file; the worker just records it
+        file_id = await stream_upload_to_gridfs(file)
+        video_url = f"/videos/{file_id}"
+        record = await save_asset_hash(content_hash, video_url, "video", size)
+        if record["url"] != video_url:
+            # A concurrent upload of the same clip won; drop our copy and point the item at its file
+            await delete_gridfs_file(video_url)
+            file_id = record["url"].rsplit("/", 1)[-1]
+        job_id = celery_app.send_task(name= "celery_worker.create_media_task",args=[media.model_dump(), str(file_id), filename, content_type])
          
         return APIResponse(
             status_code=201,
@@ -459,7 +480,7 @@ async def upload_image(
     """
     
     # Using the local function for this example:
-    image_url = await upload_to_freeimage_service(file)
+    image_url = await upload_image_once(file)
 
 
     # 2. If we get here, the upload was successful.
@@ -503,7 +524,7 @@ async def upload_video(
     """
 
     # Store the video in MongoDB GridFS
-    video_url = await save_video_to_mongodb(file)
+    video_url = await save_video_once(file)
     full_url = str(request.base_url).rstrip("/") + video_url
     # Return formatted response
     return APIResponse(
@@ -558,7 +579,7 @@ async def add_image_or_video_block_to_a_blog(
         image_types = {"image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp"}
 
         if content_type in image_types:
-            image_url = await upload_to_freeimage_service(file)
+            image_url = await upload_image_once(file)
             newly_added_media=  generate_media_json(file_url=image_url,caption=caption)
             blog.currentPageBody.append(newly_added_media)
             blog_page_data =BlogUpdate(currentPageBody=blog.currentPageBody)
@@ -581,7 +602,7 @@ async def add_image_or_video_block_to_a_blog(
         }
 
         if content_type in video_types:
-            video_url = await save_video_to_mongodb(file)
+            video_url = await save_video_once(file)
             full_url = str(request.base_url).rstrip("/") + video_url
             newly_added_media=  generate_media_json(file_url=full_url,caption=caption,media_type="video")
             blog.currentPageBody.append(newly_added_media)
@@ -3,8 +3,12 @@ from celery import Celery
 from dotenv import load_dotenv
 import asyncio
 import celery_aio_pool as aio_pool
+from celery.signals import worker_process_init, worker_process_shutdown, worker_ready, worker_shutdown
 
-from repositories.media_host import create_media, save_video_to_mongodb, save_video_to_mongodb_from_bytes, update_media_category
+from core.task_database import task_db
+from core.worker_heartbeat import WorkerHeartbeat
+
+from repositories.media_host import create_media, delete_staged_upload, read_staged_upload, save_asset_hash, save_video_to_mongodb, save_video_to_mongodb_from_bytes, update_media_category
 from schemas.media_host import MediaBase, MediaCreate, MediaUpdate
 from services.image_host import upload_to_freeimage_service, upload_to_freeimage_service_from_bytes
 load_dotenv()
@@ -15,27 +19,79 @@ backend_url = os.getenv("CELERY_RESULT_BACKEND")
 celery_app = Celery("worker", broker=broker_url, backend=backend_url,)
 celery_app.conf.update(task_track_started=True)
 
+
+@worker_process_init.connect
+def _reset_task_db(**kwargs):
+    # Pools inherited from a forking parent must not be reused in the child
+    task_db.reset()
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def _close_task_db(**kwargs):
+    task_db.close_all()
+
+
+_heartbeat = None
+
+
+@worker_ready.connect
+def _start_heartbeat(sender=None, **kwargs):
+    global _heartbeat
+    # The aio pool installs its running task loop as this thread's event loop
+    try:
+        loop = asyncio.get_event_loop_policy().get_event_loop()
+    except RuntimeError:
+        loop = None
+    _heartbeat = WorkerHeartbeat(sender.hostname, list(sender.app.amqp.queues), loop)
+    _heartbeat.start()
+
+
+@worker_shutdown.connect
+def _stop_heartbeat(**kwargs):
+    if _heartbeat is not None:
+        _heartbeat.stop()
+
 @celery_app.task(name="celery_worker.test_scheduler")
 async def test_scheduler(message):
     print(message)
     
     
 @celery_app.task(name="celery_worker.create_media_task")
-async def create_media_task(media_dict: dict,file_bytes: bytes, filename: str, content_type: str):
+async def create_media_task(media_dict: dict, file_ref, filename: str, content_type: str, content_hash: str = None, size: int = 0):
     """
     Celery worker for creating media from async function.
+
+    `file_ref` is the id of the GridFS file the API streamed the upload into.
+    Raw bytes are still accepted for jobs queued before uploads were streamed.
+    `content_hash` is recorded against the image URL so re-uploads are deduplicated.
     """
     media = MediaBase(**media_dict)
+    staged_file_id = None
     if media.mediaType=="image":
+        if isinstance(file_ref, bytes):
+            file_bytes = file_ref
+        else:
+            staged_file_id = file_ref
+            file_bytes = await read_staged_upload(staged_file_id)
         image_url = await upload_to_freeimage_service_from_bytes(file_bytes, filename, content_type)
+        if content_hash:
+            record = await save_asset_hash(content_hash, image_url, "image", size, database=task_db.database())
+            image_url = record["url"]
         media_data = MediaCreate(**media_dict,url=image_url,name=filename)
     elif media.mediaType=="video":
-        video_url = await save_video_to_mongodb_from_bytes(file_bytes, filename, content_type)
+        if isinstance(file_ref, bytes):
+            video_url = await save_video_to_mongodb_from_bytes(file_ref, filename, content_type)
+        else:
+            video_url = f"/videos/{file_ref}"
         full_url = media.requestUrl + video_url
         media_data = MediaCreate(**media_dict,url=full_url,name=filename)
     
     
     media = await create_media(media_data)
+    if staged_file_id is not None:
+        # Kept until the image is hosted and recorded, so a failed run can be retried
+        await delete_staged_upload(staged_file_id)
     return media.model_dump()
 
 
@@ -46,6 +102,17 @@ async def update_media_category_task(filter_dict: dict, media_dict: dict):
     """
  
     media_data = MediaUpdate(**media_dict)
-    return await update_media_category(filter_dict, media_data)
+    return await update_media_category(filter_dict, media_data, database=task_db.database())
+
+ 
+
+@celery_app.task(name="celery_worker.send_email_task")
+async def send_email_task(sender_email: str, receiver_email: str, message: str):
+    """
+    Celery worker for delivering a queued email over the worker's pooled SMTP connections.
+    """
+    from services.email_delivery import OutgoingEmail
+    from services.email_service import email_queue
 
- 
\ No newline at end of file
+    await email_queue.deliver(OutgoingEmail(sender_email, receiver_email, message))
+    return receiver_email
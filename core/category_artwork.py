@@ -0,0 +1,118 @@
+"""
+Artwork (fanart or crest) for each category club, resolved from TheSportsDB.
+
+`/content/categories` only reads the in-memory map filled by
+`load_category_artwork()`. Fetching happens in `refresh_category_artwork()`,
+which the scheduler runs in the background in one worker: stale or missing
+clubs are looked up concurrently and stored in the `category_artwork`
+collection. Every worker reloads its map from there every
+CATEGORY_ARTWORK_RELOAD_MINUTES, so all of them serve the same artwork.
+"""
+import asyncio
+import os
+import time
+import urllib.parse
+from typing import Optional
+import httpx
+from dotenv import load_dotenv
+from core.database import db
+from core.static_payloads import static_payloads
+from schemas.imports import CATEGORY_PAIRS
+
+load_dotenv()
+
+CATEGORY_ARTWORK_API_URL = os.getenv("CATEGORY_ARTWORK_API_URL", "https://www.thesportsdb.com/api/v1/json/3/searchteams.php")
+# A found image is looked up again after this long
+CATEGORY_ARTWORK_TTL_SECONDS = int(os.getenv("CATEGORY_ARTWORK_TTL_SECONDS", 7 * 24 * 3600))
+# Clubs without an image (or whose lookup failed) are retried sooner
+CATEGORY_ARTWORK_RETRY_SECONDS = int(os.getenv("CATEGORY_ARTWORK_RETRY_SECONDS", 3600))
+CATEGORY_ARTWORK_REFRESH_MINUTES = int(os.getenv("CATEGORY_ARTWORK_REFRESH_MINUTES", 30))
+# How often each worker re-reads the stored artwork into memory
+CATEGORY_ARTWORK_RELOAD_MINUTES = int(os.getenv("CATEGORY_ARTWORK_RELOAD_MINUTES", 2))
+CATEGORY_ARTWORK_CONCURRENCY = int(os.getenv("CATEGORY_ARTWORK_CONCURRENCY", 8))
+CATEGORY_ARTWORK_TIMEOUT = float(os.getenv("CATEGORY_ARTWORK_TIMEOUT", 10))
+
+# Most preferred first; the crest and logo are fallbacks
+IMAGE_PRIORITY = ["strFanart3", "strFanart2", "strFanart1", "strFanart4", "strTeamBadge", "strTeamLogo"]
+
+_artwork: dict[str, Optional[str]] = {}
+
+
+def _club_names() -> list[str]:
+    return [getattr(name, "value", name) for name in CATEGORY_PAIRS]
+
+
+def get_category_artwork(team_name: str) -> Optional[str]:
+    """Cached image URL for a club; never makes a request."""
+    return _artwork.get(getattr(team_name, "value", team_name))
+
+
+async def fetch_club_artwork(client: httpx.AsyncClient, team_name: str) -> Optional[str]:
+    """
+    First available image for `team_name` in IMAGE_PRIORITY order, or None if
+    the club has none. Raises httpx errors so callers can tell a failed
+    lookup from a missing image.
+    """
+    response = await client.get(f"{CATEGORY_ARTWORK_API_URL}?t={urllib.parse.quote_plus(team_name)}")
+    response.raise_for_status()
+    teams = response.json().get("teams") or []
+    if not teams:
+        print(f"Error: Team '{team_name}' not found in TheSportsDB.")
+        return None
+    for key in IMAGE_PRIORITY:
+        if teams[0].get(key):
+            return teams[0][key]
+    print(f"Error: Found team '{team_name}', but none of the preferred image keys were available.")
+    return None
+
+
+def _is_stale(doc: Optional[dict], now: float) -> bool:
+    if doc is None:
+        return True
+    ttl = CATEGORY_ARTWORK_TTL_SECONDS if doc.get("url") else CATEGORY_ARTWORK_RETRY_SECONDS
+    return doc.get("checked_at", 0) + ttl <= now
+
+
+async def load_category_artwork() -> int:
+    """Fills the in-memory map from Mongo. Returns how many clubs have an image."""
+    stored = {doc["_id"]: doc.get("url") async for doc in db.category_artwork.find({}, {"url": 1})}
+    _artwork.update({name: stored.get(name) for name in _club_names()})
+    static_payloads.rebuild("categories")
+    return sum(1 for url in _artwork.values() if url)
+
+
+async def refresh_category_artwork(force: bool = False) -> int:
+    """
+    Looks up every club whose stored artwork is missing or past its TTL and
+    saves the results. A failed lookup keeps the previous URL. Returns the
+    number of clubs looked up.
+    """
+    now = time.time()
+    stored = {doc["_id"]: doc async for doc in db.category_artwork.find({})}
+    stale = [name for name in _club_names() if force or _is_stale(stored.get(name), now)]
+    semaphore = asyncio.Semaphore(CATEGORY_ARTWORK_CONCURRENCY)
+
+    async def resolve(client: httpx.AsyncClient, name: str):
+        async with semaphore:
+            previous = (stored.get(name) or {}).get("url")
+            update = {"checked_at": now}
+            try:
+                update["url"] = await fetch_club_artwork(client, name)
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"Artwork lookup for '{name}' failed: {e}")
+                update["url"] = previous
+                update["last_error"] = str(e)
+            await db.category_artwork.update_one({"_id": name}, {"$set": update}, upsert=True)
+            return name, update["url"]
+
+    if stale:
+        async with httpx.AsyncClient(timeout=CATEGORY_ARTWORK_TIMEOUT) as client:
+            results = await asyncio.gather(*(resolve(client, name) for name in stale))
+        stored_urls = {name: (doc or {}).get("url") for name, doc in stored.items()}
+        stored_urls.update(dict(results))
+        _artwork.update({name: stored_urls.get(name) for name in _club_names()})
+    else:
+        # Another worker may have refreshed the store; pick its results up
+        _artwork.update({name: stored[name].get("url") for name in _club_names() if name in stored})
+    static_payloads.rebuild("categories")
+    return len(stale)
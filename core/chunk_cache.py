@@ -0,0 +1,235 @@
+import asyncio
+import os
+import shutil
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+from dotenv import load_dotenv
+from gridfs.errors import CorruptGridFile
+
+load_dotenv()
+
+# Both budgets are per worker process: with N uvicorn workers the cache can
+# hold N times as much, so size them accordingly.
+# In-memory budget for cached GridFS chunks; 0 (the default) disables the cache
+VIDEO_CHUNK_CACHE_MB = int(os.getenv("VIDEO_CHUNK_CACHE_MB", 0))
+# Optional second tier: chunks evicted from memory are kept on disk, in a
+# subdirectory per process so workers never share or remove each other's files
+VIDEO_CHUNK_CACHE_DIR = os.getenv("VIDEO_CHUNK_CACHE_DIR")
+VIDEO_CHUNK_CACHE_DISK_MB = int(os.getenv("VIDEO_CHUNK_CACHE_DISK_MB", 512))
+# Missing chunks are fetched from Mongo in runs of up to this many per query
+CHUNK_FETCH_BATCH = 8
+
+ChunkKey = tuple[str, int]
+
+
+class ChunkCache:
+    """
+    LRU cache of GridFS chunks keyed by (file_id, n).
+
+    Streaming a range asks for each chunk in order; cached ones are served
+    from memory (or the disk tier), consecutive misses are fetched from
+    `fs.chunks` in one query. GridFS files are immutable, so entries never
+    go stale, they only get evicted.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes if disk_dir else 0
+        self._memory: OrderedDict[ChunkKey, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: OrderedDict[ChunkKey, int] = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_pid: Optional[int] = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bytes_from_cache": 0,
+            "bytes_from_db": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    # ---------------- memory tier ----------------
+
+    def _put_memory(self, key: ChunkKey, data: bytes) -> list[tuple[ChunkKey, bytes]]:
+        """Stores `data`; returns the entries evicted to stay in budget."""
+        if len(data) > self.max_bytes:
+            return []
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        evicted = []
+        while self._memory_bytes > self.max_bytes:
+            evicted_key, evicted_data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted_data)
+            self.stats["memory_evictions"] += 1
+            evicted.append((evicted_key, evicted_data))
+        return evicted
+
+    async def _store(self, key: ChunkKey, data: bytes):
+        """Puts a chunk in memory and spills whatever that evicts to the disk tier."""
+        for evicted_key, evicted_data in self._put_memory(key, data):
+            await self._put_disk(evicted_key, evicted_data)
+
+    # ---------------- disk tier ----------------
+    # File I/O runs in a thread; the index (`_disk`) is only touched on the loop
+
+    def _process_dir(self) -> str:
+        # Resolved per pid so a cache created before a fork doesn't share its directory
+        return os.path.join(self.disk_dir, str(os.getpid()))
+
+    def _disk_path(self, key: ChunkKey) -> str:
+        return os.path.join(self._process_dir(), f"{key[0]}_{key[1]}.chunk")
+
+    def _write_file(self, path: str, data: bytes):
+        if self._disk_pid != os.getpid():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._disk_pid = os.getpid()
+        # Readers only ever see a complete file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _remove_files(paths: list[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def _put_disk(self, key: ChunkKey, data: bytes):
+        if not self.disk_max_bytes or key in self._disk or len(data) > self.disk_max_bytes:
+            return
+        try:
+            await asyncio.to_thread(self._write_file, self._disk_path(key), data)
+        except OSError as e:
+            print(f"Chunk cache disk write failed: {e}")
+            return
+        if key in self._disk:
+            return
+        self._disk[key] = len(data)
+        self._disk_bytes += len(data)
+        evicted = []
+        while self._disk_bytes > self.disk_max_bytes:
+            evicted_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats["disk_evictions"] += 1
+            evicted.append(self._disk_path(evicted_key))
+        if evicted:
+            await asyncio.to_thread(self._remove_files, evicted)
+
+    async def _get_disk(self, key: ChunkKey) -> Optional[bytes]:
+        if key not in self._disk:
+            return None
+        path = self._disk_path(key)
+        try:
+            data = await asyncio.to_thread(self._read_file, path)
+        except OSError:
+            data = None
+        # Either promoted back to memory or unreadable; the disk copy goes in both cases
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+        await asyncio.to_thread(self._remove_files, [path])
+        return data
+
+    # ---------------- lookups ----------------
+
+    async def get(self, key: ChunkKey) -> Optional[bytes]:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return data
+        data = await self._get_disk(key)
+        if data is not None:
+            self.stats["disk_hits"] += 1
+            await self._store(key, data)
+            return data
+        return None
+
+    async def _fetch(self, chunks_collection, file_id, first: int, last: int) -> dict[int, bytes]:
+        cursor = chunks_collection.find(
+            {"files_id": file_id, "n": {"$gte": first, "$lte": last}},
+            {"n": 1, "data": 1},
+        ).sort("n", 1)
+        fetched = {}
+        async for chunk in cursor:
+            data = bytes(chunk["data"])
+            fetched[chunk["n"]] = data
+            self.stats["misses"] += 1
+            self.stats["bytes_from_db"] += len(data)
+            await self._store((str(file_id), chunk["n"]), data)
+        return fetched
+
+    async def iter_range(self, chunks_collection, file_id, chunk_size: int, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yields bytes start..end (inclusive) of a GridFS file, chunk by chunk."""
+        first_chunk = start // chunk_size
+        last_chunk = end // chunk_size
+        fetched: dict[int, bytes] = {}
+        n = first_chunk
+        while n <= last_chunk:
+            # Chunks from the current batch are served from it, even if the budget already evicted them
+            data = fetched.pop(n, None)
+            if data is None:
+                data = await self.get((str(file_id), n))
+                if data is not None:
+                    self.stats["bytes_from_cache"] += len(data)
+            if data is None:
+                # Fetch this miss and the following chunks up to the next cached one
+                batch_end = n
+                while batch_end < min(n + CHUNK_FETCH_BATCH - 1, last_chunk) and (str(file_id), batch_end + 1) not in self._memory:
+                    batch_end += 1
+                fetched = await self._fetch(chunks_collection, file_id, n, batch_end)
+                data = fetched.pop(n, None)
+                if data is None:
+                    # Headers for the full range are already out; abort rather than send a short body
+                    raise CorruptGridFile(f"no chunk #{n} for file {file_id}")
+
+            chunk_start = n * chunk_size
+            yield data[max(start - chunk_start, 0): end - chunk_start + 1]
+            n += 1
+
+    def snapshot(self) -> dict:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_bytes": self._memory_bytes,
+            "memory_chunks": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+            "disk_chunks": len(self._disk),
+        }
+
+    def clear(self):
+        """Empties both tiers and removes this process's disk directory."""
+        self._memory.clear()
+        self._memory_bytes = 0
+        self._disk.clear()
+        self._disk_bytes = 0
+        if self.disk_dir:
+            shutil.rmtree(self._process_dir(), ignore_errors=True)
+            self._disk_pid = None
+
+
+chunk_cache = ChunkCache(
+    max_bytes=VIDEO_CHUNK_CACHE_MB * 1024 * 1024,
+    disk_dir=VIDEO_CHUNK_CACHE_DIR,
+    disk_max_bytes=VIDEO_CHUNK_CACHE_DISK_MB * 1024 * 1024,
+)
@@ -140,11 +140,13 @@ if DB_TYPE == "sqlite":
 
 elif DB_TYPE == "mongodb":
     from motor.motor_asyncio import AsyncIOMotorClient
+    from core.metrics import MongoCommandMetrics
 
     DB = os.getenv("DB_NAME")
     MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 
-    client = AsyncIOMotorClient(MONGO_URL)
+    # Command timings feed the /metrics endpoint
+    client = AsyncIOMotorClient(MONGO_URL, event_listeners=[MongoCommandMetrics()])
     db = client[DB]
 
 else:
@@ -0,0 +1,181 @@
+"""
+Background health prober.
+
+Mongo, Redis, the APScheduler heartbeat and the Celery worker heartbeats
+(core/worker_heartbeat.py) are probed concurrently, each under its own
+deadline, every HEALTH_PROBE_INTERVAL_SECONDS. The health routes only read
+the last snapshot, so a slow or dead dependency never holds a request.
+"""
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Optional
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+from core.database import db
+from core.worker_heartbeat import (
+    CELERY_HEARTBEAT_MAX_AGE,
+    CELERY_LOOP_LAG_WARN_MS,
+    HEARTBEAT_REDIS_URL,
+    read_worker_heartbeats,
+)
+
+load_dotenv()
+
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", 10))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", 2))
+# A heartbeat older than this means the scheduler is stuck
+APSCHEDULER_HEARTBEAT_MAX_AGE = 30
+
+SERVICE_DESCRIPTIONS = {
+    "mongo": "Primary Database (MongoDB)",
+    "redis": "Cache & Message Broker (Redis)",
+    "apscheduler": "Internal Job Scheduler (APScheduler)",
+    "celery": "Background Task Worker (Celery)",
+}
+
+
+class ProbeFailed(Exception):
+    """A probe reached its service but got a bad answer; `status` says how bad."""
+
+    def __init__(self, message: str, status: str = "unhealthy", extra: Optional[dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra or {}
+
+
+class HealthProber:
+    def __init__(self, interval: float = HEALTH_PROBE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._redis: Optional[aioredis.Redis] = None
+        # Worker heartbeats live on the broker, which may be another Redis
+        self._broker: Optional[aioredis.Redis] = None
+        self._task: Optional[asyncio.Task] = None
+        self._probes: dict[str, tuple[Callable[[], Awaitable[str]], float]] = {
+            "mongo": (self._probe_mongo, HEALTH_PROBE_TIMEOUT_SECONDS),
+            "redis": (self._probe_redis, HEALTH_PROBE_TIMEOUT_SECONDS),
+            "apscheduler": (self._probe_apscheduler, HEALTH_PROBE_TIMEOUT_SECONDS),
+            "celery": (self._probe_celery, HEALTH_PROBE_TIMEOUT_SECONDS),
+        }
+        self.snapshot: Optional[dict] = None
+
+    # ---------------- probes ----------------
+    # Each returns a success message (optionally with extra fields) or
+    # raises (ProbeFailed for a bad answer)
+
+    async def _probe_mongo(self) -> str:
+        await db.command("ping")
+        return "Connection successful and ping acknowledged."
+
+    async def _probe_redis(self) -> str:
+        await self._redis.ping()
+        return "Connection successful and ping acknowledged."
+
+    async def _probe_apscheduler(self) -> str:
+        heartbeat = await self._redis.get("apscheduler:heartbeat")
+        if not heartbeat:
+            raise ProbeFailed("No heartbeat found. Scheduler may be down or has not run yet.")
+        age = time.time() - float(heartbeat)
+        if age > APSCHEDULER_HEARTBEAT_MAX_AGE:
+            raise ProbeFailed(f"Stale heartbeat. Last seen {int(age)}s ago. Scheduler may be stuck or overloaded.", "degraded")
+        return f"Scheduler is active. Last heartbeat {int(age)}s ago."
+
+    async def _probe_celery(self) -> tuple[str, dict]:
+        now = time.time()
+        heartbeats = await read_worker_heartbeats(self._broker)
+        live = [beat for beat in heartbeats if now - beat["timestamp"] <= CELERY_HEARTBEAT_MAX_AGE]
+        if not live:
+            raise ProbeFailed("No recent worker heartbeat. Workers may be down.")
+        workers = {
+            beat["hostname"]: {
+                "age_s": round(now - beat["timestamp"], 1),
+                "queue_depth": beat["queue_depth"],
+                "reserved": beat["reserved"],
+                "active": beat["active"],
+                "loop_lag_ms": beat["loop_lag_ms"],
+            }
+            for beat in live
+        }
+        lagging = [beat["hostname"] for beat in live if (beat["loop_lag_ms"] or 0) > CELERY_LOOP_LAG_WARN_MS]
+        if lagging:
+            raise ProbeFailed(f"Event loop lagging on {', '.join(lagging)}.", "degraded", {"workers": workers})
+        return f"{len(live)} worker(s) alive.", {"workers": workers}
+
+    async def _run_probe(self, name: str) -> dict:
+        probe, timeout = self._probes[name]
+        start_time = time.perf_counter()
+        extra = {}
+        try:
+            message = await asyncio.wait_for(probe(), timeout)
+            if isinstance(message, tuple):
+                message, extra = message
+            status = "healthy"
+        except ProbeFailed as e:
+            status, message, extra = e.status, str(e), e.extra
+        except asyncio.TimeoutError:
+            status, message = "unhealthy", f"No answer within {timeout:g}s"
+        except Exception as e:
+            status, message = "unhealthy", f"Connection failed: {e}"
+        return {
+            "description": SERVICE_DESCRIPTIONS[name],
+            "status": status,
+            "latency_ms": round((time.perf_counter() - start_time) * 1000, 2),
+            "message": message,
+            **extra,
+        }
+
+    async def probe_all(self) -> dict:
+        names = list(self._probes)
+        results = await asyncio.gather(*(self._run_probe(name) for name in names))
+        statuses = {result["status"] for result in results}
+        if "unhealthy" in statuses:
+            overall_status = "unhealthy"
+        elif "degraded" in statuses:
+            overall_status = "degraded"
+        else:
+            overall_status = "healthy"
+        self.snapshot = {
+            "status": overall_status,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "checked_at": time.time(),
+            "services": dict(zip(names, results)),
+        }
+        return self.snapshot
+
+    async def get_snapshot(self) -> dict:
+        """The last probe results; probes once if the prober hasn't finished a round yet."""
+        if self.snapshot is None:
+            return await self.probe_all()
+        return self.snapshot
+
+    # ---------------- lifecycle ----------------
+
+    async def _probe_forever(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"Health probe round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self, redis_url: str):
+        self._redis = aioredis.Redis.from_url(redis_url, socket_connect_timeout=HEALTH_PROBE_TIMEOUT_SECONDS)
+        self._broker = aioredis.Redis.from_url(HEARTBEAT_REDIS_URL, socket_connect_timeout=HEALTH_PROBE_TIMEOUT_SECONDS)
+        self._task = asyncio.create_task(self._probe_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        for client in (self._redis, self._broker):
+            if client is not None:
+                await client.aclose()
+        self._redis = None
+        self._broker = None
+
+
+health_prober = HealthProber()
@@ -0,0 +1,161 @@
+"""
+Index registry for every collection the API queries.
+
+Applied once per deploy (or on API startup with ENSURE_INDEXES_ON_STARTUP=1):
+
+    python -m core.indexes            # create missing indexes
+    python -m core.indexes --check    # ...then explain() every query shape, exit 1 on COLLSCAN
+"""
+import asyncio
+import sys
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from core.database import db
+from core.search import SEARCH_WEIGHTS
+from repositories.blog import blog_page_query, encode_blog_cursor
+from sub_app1.repository.blog import PUBLISHED_FILTER, prefix_filter, search_filter
+from sub_app1.services.utils import BLOG_TYPE_MAP, SORT_MAP, get_author_filter, get_category_filter
+
+# Sorts offered by the `sort` parameter; `_id` breaks ties for keyset pagination
+BLOG_SORTS = [(sort["sort_field"], sort["sort_order"]) for sort in SORT_MAP.values()]
+BLOG_SORT_FIELDS = tuple(dict.fromkeys(field for field, _ in BLOG_SORTS))
+# Filters the public blog routes combine with `state`, built by the routes' own helpers
+BLOG_ROUTE_FILTERS = [*BLOG_TYPE_MAP.values(), get_category_filter("sample"), get_author_filter("sample")]
+BLOG_FILTER_FIELDS = tuple(dict.fromkeys(field for route_filter in BLOG_ROUTE_FILTERS for field in route_filter))
+
+
+def _blog_indexes() -> list[IndexModel]:
+    indexes = []
+    for sort_field in BLOG_SORT_FIELDS:
+        # Admin listing: no filter, sorted only
+        indexes.append(IndexModel([(sort_field, DESCENDING), ("_id", DESCENDING)], name=f"{sort_field}_id"))
+        # Public listing: state=published + sort
+        indexes.append(IndexModel([("state", ASCENDING), (sort_field, DESCENDING), ("_id", DESCENDING)], name=f"state_{sort_field}_id"))
+        for filter_field in BLOG_FILTER_FIELDS:
+            indexes.append(IndexModel(
+                [("state", ASCENDING), (filter_field, ASCENDING), (sort_field, DESCENDING), ("_id", DESCENDING)],
+                name=f"state_{filter_field}_{sort_field}_id",
+            ))
+    # Ranked full-text search and prefix expansion (sub_app1/repository/blog.py)
+    indexes.append(IndexModel(
+        [(field, TEXT) for field in SEARCH_WEIGHTS],
+        weights=SEARCH_WEIGHTS,
+        default_language="english",
+        name="blog_search",
+    ))
+    indexes.append(IndexModel([("state", ASCENDING), ("search_terms", ASCENDING)], name="state_search_terms"))
+    return indexes
+
+
+INDEXES: dict[str, list[IndexModel]] = {
+    "blogs": _blog_indexes(),
+    "media": [
+        IndexModel([("date_created", DESCENDING)], name="date_created"),
+        IndexModel([("mediaType", ASCENDING), ("date_created", DESCENDING)], name="mediaType_date_created"),
+        IndexModel([("category", ASCENDING), ("date_created", DESCENDING)], name="category_date_created"),
+        IndexModel([("url", ASCENDING), ("category", ASCENDING)], name="url_category"),
+    ],
+    # One entry per distinct upload; the unique hash is what makes deduplication race-safe
+    "media_hashes": [IndexModel([("hash", ASCENDING)], unique=True, name="hash")],
+    "accessToken": [IndexModel([("userId", ASCENDING)], name="userId")],
+    "refreshToken": [IndexModel([("userId", ASCENDING)], name="userId")],
+    "users": [IndexModel([("email", ASCENDING)], name="email")],
+    "admins": [IndexModel([("email", ASCENDING)], name="email")],
+}
+
+
+def _query_shapes() -> list[tuple[str, dict, list]]:
+    """
+    (collection, filter, sort) for each query the repositories issue. Blog
+    shapes come from the same builders the routes and repositories use;
+    the media and account lookups are plain equality filters.
+    """
+    shapes = []
+    for sort_field, sort_order in BLOG_SORTS:
+        filters = [{}, dict(PUBLISHED_FILTER)] + [{**PUBLISHED_FILTER, **route_filter} for route_filter in BLOG_ROUTE_FILTERS]
+        for filter_dict in filters:
+            shapes.append(("blogs", *blog_page_query(filter_dict, sort_field, sort_order)))
+        # A follow-up keyset page
+        cursor = encode_blog_cursor({"_id": ObjectId("0" * 24), sort_field: 0}, sort_field, sort_order)
+        shapes.append(("blogs", *blog_page_query(dict(PUBLISHED_FILTER), sort_field, sort_order, cursor)))
+    shapes.append(("blogs", search_filter(["sample"]), []))
+    shapes.append(("blogs", search_filter(["sample"], {"title": {"$regex": "sample", "$options": "i"}}), []))
+    shapes.append(("blogs", prefix_filter("sa"), []))
+    shapes += [
+        ("media", {}, [("date_created", DESCENDING)]),
+        ("media", {"mediaType": "video"}, [("date_created", DESCENDING)]),
+        ("media", {"category": "sample"}, [("date_created", DESCENDING)]),
+        ("media", {"url": "sample", "category": "sample"}, []),
+        ("media_hashes", {"hash": "sample"}, []),
+        ("accessToken", {"userId": "sample"}, []),
+        ("refreshToken", {"userId": "sample"}, []),
+        ("users", {"email": "sample"}, []),
+        ("admins", {"email": "sample"}, []),
+    ]
+    return shapes
+
+
+QUERY_SHAPES = _query_shapes()
+
+
+async def ensure_indexes(database=db) -> dict[str, list[str]]:
+    """
+    Creates every registered index that does not exist yet.
+    `create_indexes` is a no-op for indexes already present with the same spec.
+
+    Returns:
+        dict: collection -> names of the indexes ensured.
+    """
+    ensured = {}
+    for collection, indexes in INDEXES.items():
+        try:
+            ensured[collection] = await database[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            # e.g. an index with the same name but different keys created by hand
+            print(f"Could not ensure indexes on {collection}: {e}")
+    return ensured
+
+
+def _plan_stages(plan: dict):
+    yield plan.get("stage")
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+
+
+async def find_collection_scans(database=db) -> list[tuple[str, dict, list]]:
+    """
+    Runs explain() on every registered query shape.
+
+    Returns:
+        list: The shapes whose winning plan contains a COLLSCAN.
+    """
+    offenders = []
+    for collection, filter_dict, sort in QUERY_SHAPES:
+        command = {"find": collection, "filter": filter_dict}
+        if sort:
+            command["sort"] = dict(sort)
+        explained = await database.command("explain", command, verbosity="queryPlanner")
+        winning_plan = explained["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in _plan_stages(winning_plan):
+            offenders.append((collection, filter_dict, sort))
+    return offenders
+
+
+async def _main(check: bool) -> int:
+    for collection, names in (await ensure_indexes()).items():
+        print(f"{collection}: {', '.join(names)}")
+    if not check:
+        return 0
+    offenders = await find_collection_scans()
+    for collection, filter_dict, sort in offenders:
+        print(f"COLLSCAN: {collection} filter={filter_dict} sort={sort}")
+    print(f"{len(QUERY_SHAPES) - len(offenders)}/{len(QUERY_SHAPES)} query shapes use an index")
+    return 1 if offenders else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(check="--check" in sys.argv)))
@@ -0,0 +1,392 @@
+"""
+Request, Mongo and Redis metrics exported in Prometheus text format.
+
+Each worker process keeps plain in-memory counters (no locks on the
+request path, which runs on one event loop) and pushes a snapshot of them
+to Redis every METRICS_FLUSH_SECONDS. `/metrics` sums the snapshots of all
+workers, so a scrape of any worker covers the whole deployment.
+
+Counters must never go down, so a worker's snapshot outlives the worker:
+once it stops (or its liveness key expires), its final counts are folded
+into a retired total in Redis and keep being exported. Gauges only come
+from live workers.
+"""
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+from pymongo import monitoring
+
+load_dotenv()
+
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+# worker id -> last snapshot; kept after the worker is gone until folded
+METRICS_WORKERS_KEY = "metrics:workers"
+# Flattened counters of workers that are gone (see `_flatten`)
+METRICS_RETIRED_KEY = "metrics:retired"
+# Expires when a worker stops flushing
+METRICS_LIVE_KEY_PREFIX = "metrics:live:"
+METRICS_NAMESPACE = "app"
+# Upper bounds in seconds; a final +Inf bucket catches the rest
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HISTOGRAM_SECTIONS = ("requests", "mongo", "redis")
+
+# KEYS: workers hash, retired hash. ARGV: worker id, its snapshot as read,
+# then field/increment pairs. Moves the worker's counters into the retired
+# total, once, and only if the worker hasn't written a newer snapshot since
+FOLD_WORKER_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('HDEL', KEYS[1], ARGV[1])
+for i = 3, #ARGV, 2 do
+    redis.call('HINCRBYFLOAT', KEYS[2], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        # Per bucket, not cumulative; `render_prometheus` adds them up
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.requests: dict[tuple[str, str, str], LatencyHistogram] = {}
+        self.mongo: dict[tuple[str, str], LatencyHistogram] = {}
+        self.redis: dict[tuple[str, str], LatencyHistogram] = {}
+        self.in_flight = 0
+        self._collectors: dict[str, tuple[Callable[[], dict], frozenset]] = {}
+        # Mongo events arrive on driver threads
+        self._mongo_lock = threading.Lock()
+        # Unique per process start: a restarted worker may get the same pid
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._redis_client: Optional[aioredis.Redis] = None
+        self._fold_script = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    # ---------------- recording ----------------
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, str(status))
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def observe_redis(self, operation: str, seconds: float, ok: bool = True):
+        key = (operation, "ok" if ok else "error")
+        histogram = self.redis.get(key)
+        if histogram is None:
+            histogram = self.redis[key] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def observe_mongo(self, command: str, seconds: float, ok: bool = True):
+        key = (command, "ok" if ok else "error")
+        with self._mongo_lock:
+            histogram = self.mongo.get(key)
+            if histogram is None:
+                histogram = self.mongo[key] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def register_collector(self, name: str, collect: Callable[[], dict], gauges: Iterable[str] = ()):
+        """
+        Adds another subsystem's numeric stats (e.g. `response_cache.stats`),
+        exported as `app_<name>_<key>` and summed across workers. Keys are
+        counters unless listed in `gauges` (current values such as sizes).
+        """
+        self._collectors[name] = (collect, frozenset(gauges))
+
+    # ---------------- snapshots ----------------
+
+    @staticmethod
+    def _dump(histograms: dict) -> list:
+        return [[*key, histogram.counts, histogram.sum] for key, histogram in list(histograms.items())]
+
+    def snapshot(self) -> dict:
+        collected, gauges = {}, {}
+        for name, (collect, gauge_keys) in self._collectors.items():
+            try:
+                values = {
+                    key: value for key, value in collect().items()
+                    if isinstance(value, (int, float)) and not isinstance(value, bool)
+                }
+            except Exception as e:
+                print(f"Metrics collector {name} failed: {e}")
+                continue
+            collected[name] = {key: value for key, value in values.items() if key not in gauge_keys}
+            gauges[name] = {key: value for key, value in values.items() if key in gauge_keys}
+        with self._mongo_lock:
+            mongo = self._dump(self.mongo)
+        return {
+            "requests": self._dump(self.requests),
+            "mongo": mongo,
+            "redis": self._dump(self.redis),
+            "in_flight": self.in_flight,
+            "collectors": collected,
+            "collector_gauges": gauges,
+        }
+
+    # ---------------- cross-worker aggregation ----------------
+
+    async def _flush(self) -> str:
+        value = json.dumps(self.snapshot())
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(METRICS_WORKERS_KEY, self.worker_id, value)
+            pipe.set(METRICS_LIVE_KEY_PREFIX + self.worker_id, 1, ex=int(METRICS_FLUSH_SECONDS * 3))
+            await pipe.execute()
+        return value
+
+    async def _flush_forever(self):
+        while True:
+            await asyncio.sleep(METRICS_FLUSH_SECONDS)
+            try:
+                await self._flush()
+            except Exception as e:
+                print(f"Metrics flush failed: {e}")
+
+    async def _fold(self, worker_id: str, value: str):
+        increments = [item for field, amount in _flatten(json.loads(value)).items() if amount for item in (field, amount)]
+        await self._fold_script(keys=[METRICS_WORKERS_KEY, METRICS_RETIRED_KEY], args=[worker_id, value, *increments])
+
+    async def gather_snapshots(self) -> tuple[list[dict], int]:
+        """
+        Snapshots of every worker (departed ones as a single retired total)
+        and the number of live workers. This worker flushes first, so any
+        worker answers from the same data and counters never go backwards.
+        """
+        if self._redis_client is None:
+            return [self.snapshot()], 1
+        try:
+            await self._flush()
+            workers = {
+                worker_id.decode(): value.decode()
+                for worker_id, value in (await self._redis_client.hgetall(METRICS_WORKERS_KEY)).items()
+            }
+            worker_ids = list(workers)
+            alive = await self._redis_client.mget([METRICS_LIVE_KEY_PREFIX + worker_id for worker_id in worker_ids])
+            live = {worker_id for worker_id, flag in zip(worker_ids, alive) if flag is not None}
+            for worker_id in set(worker_ids) - live:
+                await self._fold(worker_id, workers[worker_id])
+            # One transaction, so a fold by another scrape can't be counted twice
+            async with self._redis_client.pipeline(transaction=True) as pipe:
+                pipe.hgetall(METRICS_WORKERS_KEY)
+                pipe.hgetall(METRICS_RETIRED_KEY)
+                workers, retired = await pipe.execute()
+        except Exception as e:
+            print(f"Reading worker metrics failed: {e}")
+            return [self.snapshot()], 1
+        snapshots = []
+        for worker_id, value in workers.items():
+            snapshot = json.loads(value)
+            if worker_id.decode() not in live:
+                # Not folded yet; its counters still count, its gauges don't
+                snapshot["in_flight"] = 0
+                snapshot["collector_gauges"] = {}
+            snapshots.append(snapshot)
+        if retired:
+            snapshots.append(_unflatten({field.decode(): float(amount) for field, amount in retired.items()}))
+        return snapshots, len(live)
+
+    async def start(self, redis_url: str):
+        self._redis_client = aioredis.Redis.from_url(redis_url, socket_connect_timeout=2)
+        self._fold_script = self._redis_client.register_script(FOLD_WORKER_SCRIPT)
+        self._flush_task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._flush_task = None
+        if self._redis_client is not None:
+            # Hands this worker's final counts over to the retired total
+            try:
+                await self._fold(self.worker_id, await self._flush())
+                await self._redis_client.delete(METRICS_LIVE_KEY_PREFIX + self.worker_id)
+            except Exception as e:
+                print(f"Retiring worker metrics failed: {e}")
+            await self._redis_client.aclose()
+            self._redis_client = None
+
+
+metrics = MetricsRegistry()
+
+
+def _flatten(snapshot: dict) -> dict[str, float]:
+    """A snapshot's counters as {json field: value}, the retired hash's layout."""
+    flat = {}
+    for section in HISTOGRAM_SECTIONS:
+        for *labels, counts, total in snapshot.get(section, []):
+            for bucket, count in enumerate(counts):
+                flat[json.dumps([section, labels, bucket])] = count
+            flat[json.dumps([section, labels, "sum"])] = total
+    for name, values in snapshot.get("collectors", {}).items():
+        for key, value in values.items():
+            flat[json.dumps(["collectors", name, key])] = value
+    return flat
+
+
+def _unflatten(flat: dict[str, float]) -> dict:
+    """Turns the retired hash back into a snapshot (without gauges)."""
+    histograms: dict[tuple, dict] = {}
+    collected: dict[str, dict] = {}
+    for field, value in flat.items():
+        value = int(value) if value.is_integer() else value
+        section, labels, key = json.loads(field)
+        if section == "collectors":
+            collected.setdefault(labels, {})[key] = value
+            continue
+        series = histograms.setdefault((section, tuple(labels)), {"counts": [0] * (len(LATENCY_BUCKETS) + 1), "sum": 0.0})
+        if key == "sum":
+            series["sum"] = value
+        else:
+            series["counts"][key] = value
+    snapshot = {section: [] for section in HISTOGRAM_SECTIONS}
+    for (section, labels), series in histograms.items():
+        snapshot[section].append([*labels, series["counts"], series["sum"]])
+    snapshot["collectors"] = collected
+    return snapshot
+
+
+def _merge_histograms(snapshots: list[dict], section: str) -> dict[tuple, list]:
+    merged: dict[tuple, list] = {}
+    for snapshot in snapshots:
+        for *labels, counts, total in snapshot.get(section, []):
+            entry = merged.setdefault(tuple(labels), [[0] * len(counts), 0.0])
+            entry[0] = [a + b for a, b in zip(entry[0], counts)]
+            entry[1] += total
+    return merged
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values))
+
+
+def _render_histogram(lines: list[str], name: str, help_text: str, label_names: tuple[str, ...], merged: dict):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, (counts, total) in sorted(merged.items()):
+        label_text = _label_text(label_names, labels)
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{label_text}}} {total}")
+        lines.append(f"{name}_count{{{label_text}}} {cumulative}")
+
+
+def _sum_collected(snapshots: list[dict], section: str) -> dict[str, float]:
+    collected: dict[str, float] = {}
+    for snapshot in snapshots:
+        for name, values in snapshot.get(section, {}).items():
+            for key, value in values.items():
+                metric = f"{METRICS_NAMESPACE}_{name}_{key}"
+                collected[metric] = collected.get(metric, 0) + value
+    return collected
+
+
+def render_prometheus(snapshots: list[dict], workers: int) -> str:
+    lines: list[str] = []
+    _render_histogram(
+        lines, f"{METRICS_NAMESPACE}_http_request_duration_seconds", "HTTP request latency by route.",
+        ("method", "route", "status"), _merge_histograms(snapshots, "requests"),
+    )
+    lines.append(f"# HELP {METRICS_NAMESPACE}_http_requests_in_flight Requests being handled right now.")
+    lines.append(f"# TYPE {METRICS_NAMESPACE}_http_requests_in_flight gauge")
+    lines.append(f"{METRICS_NAMESPACE}_http_requests_in_flight {sum(s.get('in_flight', 0) for s in snapshots)}")
+    _render_histogram(
+        lines, f"{METRICS_NAMESPACE}_mongo_command_duration_seconds", "MongoDB command latency.",
+        ("command", "outcome"), _merge_histograms(snapshots, "mongo"),
+    )
+    _render_histogram(
+        lines, f"{METRICS_NAMESPACE}_redis_call_duration_seconds", "Redis call latency.",
+        ("operation", "outcome"), _merge_histograms(snapshots, "redis"),
+    )
+    lines.append(f"# HELP {METRICS_NAMESPACE}_workers Worker processes reporting metrics.")
+    lines.append(f"# TYPE {METRICS_NAMESPACE}_workers gauge")
+    lines.append(f"{METRICS_NAMESPACE}_workers {workers}")
+
+    for section, metric_type in (("collectors", "counter"), ("collector_gauges", "gauge")):
+        for metric, value in sorted(_sum_collected(snapshots, section).items()):
+            lines.append(f"# TYPE {metric} {metric_type}")
+            lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command; pass to the client as an event listener."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        metrics.observe_mongo(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        metrics.observe_mongo(event.command_name, event.duration_micros / 1e6, ok=False)
+
+
+def _route_template(scope) -> str:
+    """The matched route's path template, e.g. `/api/v1/articles/content/{id}`."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Newer FastAPI keeps include_router prefixes out of `route.path`
+    effective = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(effective, "path", None) or route.path
+    return scope.get("root_path", "") + path
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency per route template (not raw
+    path, to keep label cardinality bounded) and the in-flight gauge. Also
+    sets the X-Process-Time header the old timing middleware sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", ()), (b"x-process-time", b"%.6f" % (time.perf_counter() - start))]
+            await send(message)
+
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.in_flight -= 1
+            metrics.observe_request(scope["method"], _route_template(scope), status_code, time.perf_counter() - start)
@@ -0,0 +1,46 @@
+"""
+One-off data migrations. They scan whole collections, so they run once per
+deploy from here instead of in every API worker's lifespan:
+
+    python -m core.migrations              # run every migration
+    python -m core.migrations excerpts     # only the named ones
+
+Each one only touches documents it hasn't migrated yet, so reruns are cheap.
+"""
+import asyncio
+import sys
+from typing import Awaitable, Callable
+from repositories.blog import backfill_blog_excerpts, backfill_blog_search_terms
+
+MIGRATIONS: dict[str, tuple[str, Callable[[], Awaitable[int]]]] = {
+    "excerpts": ("Stored excerpts on older blogs", backfill_blog_excerpts),
+    # Prefix search (sub_app1/repository/blog.expand_prefix) only finds blogs that have them
+    "search_terms": ("Stored search terms on older blogs", backfill_blog_search_terms),
+}
+
+
+async def run_migrations(*names: str) -> dict[str, int]:
+    """
+    Runs the named migrations (all if none given) in registry order.
+
+    Returns:
+        dict: migration name -> number of documents updated.
+    """
+    unknown = set(names) - set(MIGRATIONS)
+    if unknown:
+        raise ValueError(f"Unknown migrations: {', '.join(sorted(unknown))}")
+    updated = {}
+    for name, (_, migrate) in MIGRATIONS.items():
+        if not names or name in names:
+            updated[name] = await migrate()
+    return updated
+
+
+async def _main(names: list[str]) -> int:
+    for name, count in (await run_migrations(*names)).items():
+        print(f"{name}: {MIGRATIONS[name][0]} ({count} updated)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
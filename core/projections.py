@@ -0,0 +1,33 @@
+from functools import lru_cache
+from pydantic import AliasChoices, AliasPath, BaseModel
+
+
+def _field_keys(name: str, field) -> set[str]:
+    keys = {name}
+    if field.alias:
+        keys.add(field.alias)
+    alias = field.validation_alias
+    if isinstance(alias, str):
+        keys.add(alias)
+    elif isinstance(alias, AliasPath):
+        keys.add(str(alias.path[0]))
+    elif isinstance(alias, AliasChoices):
+        for choice in alias.choices:
+            keys.add(choice if isinstance(choice, str) else str(choice.path[0]))
+    return keys
+
+
+@lru_cache(maxsize=None)
+def projection_for(model: type[BaseModel]) -> dict:
+    """
+    MongoDB projection with every top-level key `model` can be built from.
+
+    Every name and alias a field accepts is included, so the projected
+    document validates exactly like the full one. Heavy fields the model
+    doesn't declare (e.g. `currentPageBody`, `pages`) are never sent over
+    the wire.
+    """
+    keys = {"_id"}
+    for name, field in model.model_fields.items():
+        keys |= _field_keys(name, field)
+    return {key: 1 for key in sorted(keys)}
@@ -0,0 +1,124 @@
+import re
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException, Request
+from starlette.responses import StreamingResponse
+from core.conditional import is_not_modified, not_modified, validator_headers
+from core.chunk_cache import chunk_cache
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Parses a single `Range: bytes=...` header into an inclusive (start, end).
+
+    Returns None when the whole body should be sent (no header, a unit
+    other than bytes, or several ranges; serving 200 is always allowed).
+    Raises HTTPException 416 when the range can't be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip().replace(" ", ""))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first == "" and last == "":
+        return None
+    if first == "":
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise _unsatisfiable(size)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise _unsatisfiable(size)
+    return start, min(end, size - 1)
+
+
+def _unsatisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=416,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
+
+
+def if_range_allows(request: Request, etag: str, last_modified: Optional[float]) -> bool:
+    """
+    True if a Range may be honoured: no If-Range, or If-Range still names
+    the current representation (strong ETag match or an exact date).
+    """
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    if last_modified is None:
+        return False
+    try:
+        return int(parsedate_to_datetime(if_range).timestamp()) == int(last_modified)
+    except (TypeError, ValueError):
+        return False
+
+
+async def _read_range(grid_out, start: int, end: int) -> AsyncIterator[bytes]:
+    # seek() only moves the position; the next read fetches from the chunk holding `start`
+    grid_out.seek(start)
+    remaining = end - start + 1
+    chunk_size = grid_out.chunk_size
+    while remaining > 0:
+        data = await grid_out.read(min(chunk_size, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+        yield data
+
+
+def gridfs_file_response(
+    request: Request,
+    grid_out,
+    etag: str,
+    last_modified: Optional[float],
+    media_type: str,
+    chunks_collection=None,
+):
+    """
+    Response for an opened GridFS file honouring conditional and Range requests:
+    304 if the client's copy is current, 206 with only the requested chunks
+    for a satisfiable Range, otherwise the whole file.
+
+    When the bucket's `chunks_collection` is given, chunks are read through
+    the shared hot-chunk cache instead of straight from the GridOut.
+    """
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    size = grid_out.length
+    headers = {**validator_headers(etag, last_modified), "Accept-Ranges": "bytes"}
+    byte_range = None
+    if if_range_allows(request, etag, last_modified):
+        byte_range = parse_byte_range(request.headers.get("range"), size)
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(max(end - start + 1, 0))
+
+    if chunks_collection is not None and chunk_cache.enabled and end >= start:
+        body = chunk_cache.iter_range(chunks_collection, grid_out._id, grid_out.chunk_size, start, end)
+    else:
+        body = _read_range(grid_out, start, end)
+
+    return StreamingResponse(
+        body,
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
@@ -0,0 +1,335 @@
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, Optional
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+from starlette.responses import Response
+from core.conditional import is_not_modified, not_modified, validator_headers
+from core.metrics import metrics
+
+load_dotenv()
+
+# Redis copy, shared by all workers
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 300))
+# In-process copy; kept short so a missed invalidation message heals quickly
+RESPONSE_CACHE_LOCAL_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_LOCAL_TTL_SECONDS", 30))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2000))
+RESPONSE_CACHE_CHANNEL = "response-cache:invalidate"
+# v2 entries carry their ETag / Last-Modified next to the tags
+KEY_PREFIX = "resp:v2:"
+TAG_PREFIX = "resp-tag:"
+# Bumped by every invalidation of the tag, in Redis, so all workers see it
+TAG_VERSION_PREFIX = "resp-tag-version:"
+# Tags may contain commas (author names), so invalidation messages join them with the ASCII unit separator
+TAG_SEPARATOR = "\x1f"
+
+# KEYS: n tag sets, then their n version keys; ARGV[1]: version key TTL.
+# Bumps each tag's version, then deletes every cached response registered
+# under the tag sets and the sets themselves
+INVALIDATE_TAGS_SCRIPT = """
+local n = #KEYS / 2
+local removed = 0
+for i = 1, n do
+    redis.call('INCR', KEYS[n + i])
+    redis.call('EXPIRE', KEYS[n + i], ARGV[1])
+    local members = redis.call('SMEMBERS', KEYS[i])
+    for _, key in ipairs(members) do
+        removed = removed + redis.call('DEL', key)
+    end
+    redis.call('DEL', KEYS[i])
+end
+return removed
+"""
+
+# KEYS: the entry, n tag sets, then their n version keys.
+# ARGV: packed entry, TTL, then the n versions read before the body was built.
+# Stores the entry only if none of its tags was invalidated by any worker since
+SET_IF_CURRENT_SCRIPT = """
+local n = (#KEYS - 1) / 2
+for i = 1, n do
+    if (redis.call('GET', KEYS[1 + n + i]) or '') ~= ARGV[2 + i] then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = 1, n do
+    redis.call('SADD', KEYS[1 + i], KEYS[1])
+    -- Tag sets outlive their entries by one TTL at most
+    redis.call('EXPIRE', KEYS[1 + i], ARGV[2] * 2)
+end
+return 1
+"""
+
+
+def cache_key(route: str, params: dict) -> str:
+    encoded = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    return KEY_PREFIX + route + ":" + hashlib.sha1(encoded.encode()).hexdigest()
+
+
+# (etag, last_modified) of a cached response, if its route sends validators
+Validators = Optional[tuple[str, Optional[float]]]
+
+
+def _pack(body: bytes, tags: Iterable[str], validators: Validators = None) -> bytes:
+    meta = {"tags": list(tags), "validators": validators}
+    return json.dumps(meta, separators=(",", ":")).encode() + b"\n" + body
+
+
+def _unpack(value: bytes) -> tuple[bytes, tuple[str, ...], Validators]:
+    meta, _, body = value.partition(b"\n")
+    meta = json.loads(meta)
+    validators = meta.get("validators")
+    return body, tuple(meta.get("tags", ())), tuple(validators) if validators else None
+
+
+class ResponseCache:
+    """
+    Two-tier cache of serialized JSON response bodies.
+
+    Reads check an in-process LRU first, then Redis; misses build the
+    response once and store it in both. Every entry carries tags (e.g.
+    `blog:<id>`, `category:<slug>`) and `invalidate(*tags)` drops the
+    matching entries from Redis and, through pub/sub, from every worker's
+    local LRU.
+
+    A response built while one of its tags is invalidated is not stored:
+    each tag has a version in Redis that invalidation bumps, and the write
+    only goes through if the versions read before the build still hold, no
+    matter which worker invalidated.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: int = RESPONSE_CACHE_TTL_SECONDS, local_ttl: int = RESPONSE_CACHE_LOCAL_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self._local: OrderedDict[str, tuple[float, bytes, tuple[str, ...], Validators]] = OrderedDict()
+        self._redis: Optional[aioredis.Redis] = None
+        self._invalidate_script = None
+        self._set_script = None
+        self._listener_task: Optional[asyncio.Task] = None
+        # Bumped on every invalidation this worker sees; guards the local tier
+        self.generation = 0
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0}
+
+    # ---------------- local tier ----------------
+
+    def _get_local(self, key: str) -> tuple[Optional[bytes], Validators]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None, None
+        expires_at, body, _, validators = entry
+        if expires_at < time.monotonic():
+            self._local.pop(key, None)
+            return None, None
+        self._local.move_to_end(key)
+        return body, validators
+
+    def _set_local(self, key: str, body: bytes, tags: tuple[str, ...], validators: Validators = None):
+        self._local[key] = (time.monotonic() + self.local_ttl, body, tags, validators)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def _invalidate_local(self, tags: Iterable[str]):
+        self.generation += 1
+        tags = set(tags)
+        stale = [key for key, (_, _, entry_tags, _) in self._local.items() if tags.intersection(entry_tags)]
+        for key in stale:
+            self._local.pop(key, None)
+
+    # ---------------- both tiers ----------------
+
+    async def get(self, key: str) -> tuple[Optional[bytes], Validators, str]:
+        """Returns (body, validators, tier) where tier is "local", "redis" or "miss"."""
+        body, validators = self._get_local(key)
+        if body is not None:
+            self.stats["local_hits"] += 1
+            return body, validators, "local"
+        if self._redis is not None:
+            started = time.perf_counter()
+            try:
+                value = await self._redis.get(key)
+                metrics.observe_redis("response_cache_get", time.perf_counter() - started)
+            except Exception as e:
+                metrics.observe_redis("response_cache_get", time.perf_counter() - started, ok=False)
+                print(f"Response cache read failed: {e}")
+                value = None
+            if value is not None:
+                body, tags, validators = _unpack(value)
+                self._set_local(key, body, tags, validators)
+                self.stats["redis_hits"] += 1
+                return body, validators, "redis"
+        self.stats["misses"] += 1
+        return None, None, "miss"
+
+    async def tag_versions(self, tags: Iterable[str]) -> Optional[list[str]]:
+        """Current Redis versions of `tags`, to pass to `set` after building the response."""
+        tags = tuple(tags)
+        if self._redis is None or not tags:
+            return []
+        started = time.perf_counter()
+        try:
+            versions = await self._redis.mget([TAG_VERSION_PREFIX + tag for tag in tags])
+            metrics.observe_redis("response_cache_versions", time.perf_counter() - started)
+        except Exception as e:
+            metrics.observe_redis("response_cache_versions", time.perf_counter() - started, ok=False)
+            print(f"Response cache read failed: {e}")
+            return None
+        return [version.decode() if version is not None else "" for version in versions]
+
+    async def set(
+        self,
+        key: str,
+        body: bytes,
+        tags: Iterable[str],
+        generation: Optional[int] = None,
+        validators: Validators = None,
+        versions: Optional[list[str]] = None,
+    ):
+        """
+        Stores `body`; skipped if anything was invalidated since `generation`
+        (this worker) or `versions` (any worker, see `tag_versions`) was read.
+        Without `versions` the Redis copy is not written.
+        """
+        if generation is not None and generation != self.generation:
+            return
+        tags = tuple(tags)
+        self._set_local(key, body, tags, validators)
+        if self._redis is None or versions is None:
+            return
+        started = time.perf_counter()
+        try:
+            stored = await self._set_script(
+                keys=[key, *(TAG_PREFIX + tag for tag in tags), *(TAG_VERSION_PREFIX + tag for tag in tags)],
+                args=[_pack(body, tags, validators), self.ttl, *versions],
+            )
+            metrics.observe_redis("response_cache_set", time.perf_counter() - started)
+        except Exception as e:
+            metrics.observe_redis("response_cache_set", time.perf_counter() - started, ok=False)
+            print(f"Response cache write failed: {e}")
+            return
+        if not stored:
+            # Another worker invalidated a tag while this body was built
+            self._local.pop(key, None)
+
+    async def invalidate(self, *tags: str):
+        """Drops every response tagged with any of `tags`, in Redis and in every worker."""
+        tags = tuple(dict.fromkeys(tag for tag in tags if tag))
+        if not tags:
+            return
+        self.stats["invalidations"] += 1
+        self._invalidate_local(tags)
+        if self._redis is None:
+            return
+        started = time.perf_counter()
+        try:
+            await self._invalidate_script(
+                keys=[*(TAG_PREFIX + tag for tag in tags), *(TAG_VERSION_PREFIX + tag for tag in tags)],
+                args=[self.ttl * 2],
+            )
+            await self._redis.publish(RESPONSE_CACHE_CHANNEL, TAG_SEPARATOR.join(tags))
+            metrics.observe_redis("response_cache_invalidate", time.perf_counter() - started)
+        except Exception as e:
+            metrics.observe_redis("response_cache_invalidate", time.perf_counter() - started, ok=False)
+            print(f"Response cache invalidation failed: {e}")
+
+    def clear(self):
+        self._local.clear()
+
+    # ---------------- lifecycle ----------------
+
+    async def _listen(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(RESPONSE_CACHE_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message["data"]
+                data = data.decode() if isinstance(data, bytes) else data
+                self._invalidate_local(data.split(TAG_SEPARATOR))
+        finally:
+            await pubsub.aclose()
+
+    async def start(self, redis_url: str):
+        self._redis = aioredis.Redis.from_url(redis_url, socket_connect_timeout=2)
+        self._invalidate_script = self._redis.register_script(INVALIDATE_TAGS_SCRIPT)
+        self._set_script = self._redis.register_script(SET_IF_CURRENT_SCRIPT)
+        self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener_task = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+response_cache = ResponseCache()
+
+
+async def cached_json_response(
+    route: str,
+    params: dict,
+    tags: Iterable[str],
+    build: Callable[[], Awaitable[object]],
+    validators: Optional[Callable[[object, bytes], tuple[str, Optional[float]]]] = None,
+    request: Optional[Request] = None,
+) -> Response:
+    """
+    Serves `route` + `params` from the response cache, or awaits `build()`,
+    serializes it like FastAPI would and caches the bytes under `tags`.
+    HTTP errors raised by `build` propagate and are not cached.
+
+    `validators(content, body)` returns the (etag, last_modified) stored
+    with the entry; they are sent on every response and conditional
+    `request`s are answered with 304, all without calling `build` on a hit.
+    """
+    key = cache_key(route, params)
+    generation = response_cache.generation
+    body, entry_validators, tier = await response_cache.get(key)
+    if body is None:
+        tags = tuple(tags)
+        # Read before the build, so an invalidation during it is noticed
+        versions = await response_cache.tag_versions(tags)
+        content = await build()
+        body = JSONResponse(content=jsonable_encoder(content)).body
+        entry_validators = validators(content, body) if validators is not None else None
+        await response_cache.set(key, body, tags, generation, entry_validators, versions)
+    headers = {"X-Cache": tier.upper()}
+    if entry_validators is not None:
+        etag, last_modified = entry_validators
+        if request is not None and is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        headers.update(validator_headers(etag, last_modified))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cache_response(route: str, tags: Callable[..., Iterable[str]]):
+    """
+    Route decorator (placed under `@router.get`) that serves the endpoint
+    through `cached_json_response`, keyed by its parameters.
+
+    Args:
+        route: Stable name for the endpoint, part of every cache key.
+        tags: Called with the endpoint's parameters; returns its invalidation tags.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            return await cached_json_response(route, kwargs, tags(**kwargs), lambda: func(**kwargs))
+        return wrapper
+    return decorator
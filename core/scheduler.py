@@ -1,4 +1,5 @@
 import os
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.jobstores.mongodb import MongoDBJobStore
 from pymongo import MongoClient
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -11,6 +12,10 @@ mongo_client = MongoClient(MONGO_URL)
 jobstore = MongoDBJobStore(database="apscheduler", collection="background_jobs", client=mongo_client)
 scheduler = AsyncIOScheduler()
 scheduler.add_jobstore(jobstore)
+# Jobs every worker process runs for itself (e.g. reloading in-memory caches);
+# jobs in the shared Mongo store run in only one of them
+LOCAL_JOBSTORE = "local"
+scheduler.add_jobstore(MemoryJobStore(), alias=LOCAL_JOBSTORE)
 
 # EXAMPLE CODE FOR ADDING JOB
 # scheduler.add_job(alarm, "date", run_date=alarm_time, args=[datetime.now()])
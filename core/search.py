@@ -0,0 +1,43 @@
+import re
+import unicodedata
+from typing import Optional
+
+# Blog fields covered by the `blog_search` text index and how much a match in each counts
+SEARCH_WEIGHTS = {
+    "title": 10,
+    "author.name": 6,
+    "excerpt": 3,
+    "currentPageBody.content.text": 1,
+    "pages.pageBody.content.text": 1,
+}
+# Short terms are too common to be useful as prefixes
+MIN_PREFIX_LENGTH = 2
+# How many indexed terms a trailing prefix may expand to
+MAX_PREFIX_EXPANSIONS = 20
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Lowercased, accent-stripped alphanumeric words of `text`."""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(text.lower())
+
+
+def search_terms_for(*texts: Optional[str]) -> list[str]:
+    """
+    Distinct words of the given texts, stored on each blog as `search_terms`.
+    The multikey index on it lets `^prefix` lookups use index bounds.
+    """
+    terms = set()
+    for text in texts:
+        terms.update(tokenize(text))
+    return sorted(terms)
+
+
+def prefix_pattern(prefix: str) -> str:
+    """Anchored, case-sensitive regex (index friendly) for already normalized terms."""
+    return "^" + re.escape(prefix)
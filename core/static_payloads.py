@@ -0,0 +1,51 @@
+import hashlib
+from typing import Callable
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.responses import Response
+from core.conditional import is_not_modified, make_etag, not_modified, validator_headers
+
+
+class StaticPayloads:
+    """
+    JSON bodies for constant lookup routes (categories, blog types, sort
+    options), serialized once and served as bytes with a content ETag.
+
+    `register(name, build)` adds a route's payload; it is built on first
+    use and again whenever `rebuild(name)` is called (e.g. after the
+    category artwork refresh).
+    """
+
+    def __init__(self):
+        self._builders: dict[str, Callable[[], object]] = {}
+        self._payloads: dict[str, tuple[bytes, str]] = {}
+
+    def register(self, name: str, build: Callable[[], object]):
+        self._builders[name] = build
+        self._payloads.pop(name, None)
+
+    def _build(self, name: str) -> tuple[bytes, str]:
+        body = JSONResponse(content=jsonable_encoder(self._builders[name]())).body
+        payload = (body, make_etag(name, hashlib.sha256(body).hexdigest()))
+        self._payloads[name] = payload
+        return payload
+
+    def rebuild(self, *names: str):
+        """Rebuilds the named payloads (all if none given); unknown names are ignored."""
+        for name in names or tuple(self._builders):
+            if name in self._builders:
+                self._build(name)
+
+    def get(self, name: str) -> tuple[bytes, str]:
+        payload = self._payloads.get(name)
+        return payload if payload is not None else self._build(name)
+
+    def response(self, request: Request, name: str) -> Response:
+        body, etag = self.get(name)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        return Response(content=body, media_type="application/json", headers=validator_headers(etag))
+
+
+static_payloads = StaticPayloads()
@@ -0,0 +1,243 @@
+import asyncio
+import os
+import time
+import uuid
+from bisect import bisect_left, insort
+from typing import Optional
+import redis.asyncio as aioredis
+from bson import ObjectId
+from dotenv import load_dotenv
+from core.database import db
+from core.search import tokenize
+from schemas.imports import CATEGORY_PAIRS
+
+load_dotenv()
+SUGGEST_DEFAULT_LIMIT = 8
+# Blog writes are broadcast here so every worker applies them to its index
+SUGGEST_CHANNEL = "suggest:blog-changes"
+SUGGEST_PROJECTION = {"title": 1, "slug": 1, "state": 1, "author.name": 1}
+# Categories and authors are few and broad, so they are listed before titles
+KIND_ORDER = {"category": 0, "author": 1, "title": 2}
+
+
+class SuggestionIndex:
+    """
+    In-memory typeahead index over published titles, author names and categories.
+
+    Every word position of every suggestion is stored as a key in one
+    sorted list, so a prefix lookup is a `bisect` plus a short forward scan:
+    "che" finds "Chelsea" and also "Arsenal beat Chelsea". Built in full
+    once at startup; after that blog writes are applied one at a time.
+    """
+
+    def __init__(self):
+        self._keys: list[tuple[str, tuple]] = []
+        self._entries: dict[tuple, dict] = {}
+        self._blog_entries: dict[str, list[tuple]] = {}
+        self._author_counts: dict[str, int] = {}
+        self.loaded_at: Optional[float] = None
+
+    @staticmethod
+    def _word_keys(text: str) -> list[str]:
+        words = tokenize(text)
+        return [" ".join(words[i:]) for i in range(len(words))]
+
+    def _add_entry(self, entry_id: tuple, entry: dict, keep_sorted: bool = True):
+        if entry_id in self._entries:
+            return
+        self._entries[entry_id] = entry
+        for key in self._word_keys(entry["text"]):
+            if keep_sorted:
+                insort(self._keys, (key, entry_id))
+            else:
+                self._keys.append((key, entry_id))
+
+    def _remove_entry(self, entry_id: tuple):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in self._word_keys(entry["text"]):
+            position = bisect_left(self._keys, (key, entry_id))
+            if position < len(self._keys) and self._keys[position] == (key, entry_id):
+                del self._keys[position]
+
+    def add_category(self, name: str, slug: str):
+        self._add_entry(("category", slug), {"type": "category", "text": name, "slug": slug})
+
+    def upsert_blog(self, doc: dict, keep_sorted: bool = True):
+        """
+        Adds or refreshes a blog's suggestions; drops them unless it is published.
+        Bulk loads pass keep_sorted=False and call `finish_load` once at the end.
+        """
+        blog_id = str(doc["_id"])
+        self.remove_blog(blog_id)
+        if doc.get("state") != "published" or not doc.get("title"):
+            return
+
+        entry_ids = []
+        title_id = ("title", blog_id)
+        self._add_entry(title_id, {"type": "title", "text": doc["title"], "id": blog_id, "slug": doc.get("slug")}, keep_sorted)
+        entry_ids.append(title_id)
+
+        author_name = (doc.get("author") or {}).get("name")
+        if author_name:
+            author_id = ("author", author_name)
+            self._author_counts[author_name] = self._author_counts.get(author_name, 0) + 1
+            self._add_entry(author_id, {"type": "author", "text": author_name}, keep_sorted)
+            entry_ids.append(author_id)
+        self._blog_entries[blog_id] = entry_ids
+
+    def finish_load(self):
+        self._keys.sort()
+        self.loaded_at = time.time()
+
+    def remove_blog(self, blog_id: str):
+        for entry_id in self._blog_entries.pop(blog_id, []):
+            if entry_id[0] == "author":
+                remaining = self._author_counts.get(entry_id[1], 1) - 1
+                if remaining > 0:
+                    self._author_counts[entry_id[1]] = remaining
+                    continue
+                self._author_counts.pop(entry_id[1], None)
+            self._remove_entry(entry_id)
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_DEFAULT_LIMIT) -> list[dict]:
+        query = " ".join(tokenize(prefix))
+        if not query:
+            return []
+        found: dict[tuple, dict] = {}
+        position = bisect_left(self._keys, (query,))
+        # Scan a little past `limit` so categories/authors can outrank titles
+        while position < len(self._keys) and len(found) < limit * 4:
+            key, entry_id = self._keys[position]
+            if not key.startswith(query):
+                break
+            found.setdefault(entry_id, self._entries[entry_id])
+            position += 1
+        ranked = sorted(found.values(), key=lambda entry: (KIND_ORDER[entry["type"]], len(entry["text"])))
+        return ranked[:limit]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _new_index() -> SuggestionIndex:
+    index = SuggestionIndex()
+    for name, slug in CATEGORY_PAIRS.items():
+        index.add_category(getattr(name, "value", name), getattr(slug, "value", slug))
+    return index
+
+
+suggestion_index = _new_index()
+
+# Set by `start_suggestion_index`; when it is None (e.g. inside Celery
+# workers) changes only reach this process's index.
+_redis: Optional[aioredis.Redis] = None
+_listener_task: Optional[asyncio.Task] = None
+# Changes seen while a rebuild runs; replayed on the new index once it is swapped in
+_pending: Optional[list[tuple[str, str]]] = None
+# Lets a worker skip its own broadcasts, which it has already applied
+_origin = uuid.uuid4().hex
+
+
+async def _apply_change(action: str, blog_id: str):
+    if _pending is not None:
+        _pending.append((action, blog_id))
+        return
+    if action == "remove":
+        suggestion_index.remove_blog(blog_id)
+        return
+    doc = await db.blogs.find_one({"_id": ObjectId(blog_id)}, SUGGEST_PROJECTION) if ObjectId.is_valid(blog_id) else None
+    if doc is None:
+        suggestion_index.remove_blog(blog_id)
+    else:
+        suggestion_index.upsert_blog(doc)
+
+
+async def _publish(action: str, blog_id: str):
+    if _pending is not None:
+        _pending.append((action, blog_id))
+    if _redis is None:
+        return
+    try:
+        await _redis.publish(SUGGEST_CHANNEL, f"{_origin}:{action}:{blog_id}")
+    except Exception as e:
+        print(f"Failed to publish suggestion index change: {e}")
+
+
+async def publish_blog_upsert(doc: dict):
+    """Applies a created or updated blog locally and in every other worker."""
+    suggestion_index.upsert_blog(doc)
+    await _publish("upsert", str(doc["_id"]))
+
+
+async def publish_blog_removal(blog_id: str):
+    suggestion_index.remove_blog(blog_id)
+    await _publish("remove", blog_id)
+
+
+async def rebuild_suggestion_index():
+    """Loads every published blog into a fresh index and swaps it in."""
+    global suggestion_index, _pending
+    _pending = []
+    try:
+        index = _new_index()
+        cursor = db.blogs.find({"state": "published"}, SUGGEST_PROJECTION)
+        async for doc in cursor:
+            index.upsert_blog(doc, keep_sorted=False)
+        index.finish_load()
+        suggestion_index = index
+        # The cursor may have read some blogs before these changes; reapply them
+        pending, _pending = _pending, None
+        for action, blog_id in pending:
+            await _apply_change(action, blog_id)
+    finally:
+        _pending = None
+
+
+def get_suggestion_index() -> SuggestionIndex:
+    return suggestion_index
+
+
+async def _listen():
+    pubsub = _redis.pubsub()
+    await pubsub.subscribe(SUGGEST_CHANNEL)
+    try:
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            data = message["data"]
+            origin, action, blog_id = (data.decode() if isinstance(data, bytes) else data).split(":", 2)
+            if origin == _origin:
+                continue
+            try:
+                await _apply_change(action, blog_id)
+            except Exception as e:
+                print(f"Failed to apply suggestion index change: {e}")
+    finally:
+        await pubsub.aclose()
+
+
+async def start_suggestion_index(redis_url: str):
+    """Subscribes to blog changes, then does the one full build."""
+    global _redis, _listener_task
+    _redis = aioredis.Redis.from_url(redis_url, socket_connect_timeout=2)
+    _listener_task = asyncio.create_task(_listen())
+    try:
+        await rebuild_suggestion_index()
+    except Exception as e:
+        print(f"Failed to build suggestion index: {e}")
+
+
+async def stop_suggestion_index():
+    global _redis, _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        _listener_task = None
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import Optional
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from pymongo import monitoring
+
+load_dotenv()
+
+TASK_DB_MAX_POOL_SIZE = int(os.getenv("TASK_DB_MAX_POOL_SIZE", 20))
+TASK_DB_MIN_POOL_SIZE = int(os.getenv("TASK_DB_MIN_POOL_SIZE", 1))
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection counters for the clients of a `MotorClientRegistry`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checked_out": 0,
+            "pools_cleared": 0,
+        }
+
+    def _bump(self, name: str, by: int = 1):
+        # pymongo publishes events from its own threads
+        with self._lock:
+            self.counts[name] += by
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._bump("pools_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._bump("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._bump("checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._bump("checkouts")
+        self._bump("checked_out")
+
+    def connection_checked_in(self, event):
+        self._bump("checked_out", -1)
+
+
+class MotorClientRegistry:
+    """
+    One pooled AsyncIOMotorClient per event loop, for code that runs outside
+    the API process (Celery tasks).
+
+    Motor clients are bound to the loop they first run on, so a client is
+    created lazily for each loop and reused by every task on it. `reset()`
+    drops clients inherited across a fork, `close_all()` closes the pools
+    on worker shutdown.
+    """
+
+    def __init__(self, mongo_url: str, db_name: str, max_pool_size: int = TASK_DB_MAX_POOL_SIZE, min_pool_size: int = TASK_DB_MIN_POOL_SIZE):
+        self.mongo_url = mongo_url
+        self.db_name = db_name
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self.metrics = PoolMetrics()
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncIOMotorClient]" = weakref.WeakKeyDictionary()
+        self._buckets: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncIOMotorGridFSBucket]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def client(self) -> AsyncIOMotorClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(loop)
+                if client is None:
+                    client = AsyncIOMotorClient(
+                        self.mongo_url,
+                        maxPoolSize=self.max_pool_size,
+                        minPoolSize=self.min_pool_size,
+                        event_listeners=[self.metrics],
+                        io_loop=loop,
+                    )
+                    self._clients[loop] = client
+        return client
+
+    def database(self):
+        return self.client()[self.db_name]
+
+    def gridfs(self) -> AsyncIOMotorGridFSBucket:
+        loop = asyncio.get_running_loop()
+        bucket = self._buckets.get(loop)
+        if bucket is None:
+            bucket = AsyncIOMotorGridFSBucket(self.database())
+            self._buckets[loop] = bucket
+        return bucket
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics.counts,
+            "clients": len(self._clients),
+            "max_pool_size": self.max_pool_size,
+        }
+
+    def reset(self):
+        """Forget clients without closing them; their sockets belong to the parent process."""
+        with self._lock:
+            self._clients = weakref.WeakKeyDictionary()
+            self._buckets = weakref.WeakKeyDictionary()
+
+    def close_all(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = weakref.WeakKeyDictionary()
+            self._buckets = weakref.WeakKeyDictionary()
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                print(f"Error closing task database client: {e}")
+
+
+task_db = MotorClientRegistry(
+    mongo_url=os.getenv("MONGO_URL", "mongodb://localhost:27017"),
+    db_name=os.getenv("DB_NAME"),
+)
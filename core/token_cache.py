@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", 60))
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+INVALIDATION_CHANNEL = "token-cache:invalidate"
+
+
+class TokenCache:
+    """
+    Bounded TTL + LRU cache of access token id -> token fields
+    (userId, role, status, dateCreated).
+
+    Only used to skip the `accessToken` find_one on hot paths; anything that
+    revokes or changes a token must call `invalidate` / `invalidate_user`.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE, ttl: int = TOKEN_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def get(self, token_id: str) -> Optional[dict]:
+        entry = self._entries.get(token_id)
+        if entry is None:
+            return None
+        expires_at, token = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(token_id, None)
+            return None
+        self._entries.move_to_end(token_id)
+        return dict(token)
+
+    def set(self, token_id: str, token: dict):
+        self._entries[token_id] = (time.monotonic() + self.ttl, dict(token))
+        self._entries.move_to_end(token_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, token_id: str):
+        self._entries.pop(token_id, None)
+
+    def invalidate_user(self, user_id: str):
+        stale = [token_id for token_id, (_, token) in self._entries.items() if token.get("userId") == user_id]
+        for token_id in stale:
+            self._entries.pop(token_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+token_cache = TokenCache()
+
+# Set by `start_invalidation_listener`; when it is None (e.g. inside Celery
+# workers) invalidations only apply to this process and the TTL bounds staleness.
+_redis: Optional[aioredis.Redis] = None
+_listener_task: Optional[asyncio.Task] = None
+
+
+def _apply_invalidation(message: str):
+    kind, _, value = message.partition(":")
+    if kind == "token":
+        token_cache.invalidate(value)
+    elif kind == "user":
+        token_cache.invalidate_user(value)
+
+
+async def publish_invalidation(kind: str, value: str):
+    """Drops the entry locally and asks every other worker to do the same."""
+    _apply_invalidation(f"{kind}:{value}")
+    if _redis is None:
+        return
+    try:
+        await _redis.publish(INVALIDATION_CHANNEL, f"{kind}:{value}")
+    except Exception as e:
+        print(f"Failed to publish token cache invalidation: {e}")
+
+
+async def _listen():
+    pubsub = _redis.pubsub()
+    await pubsub.subscribe(INVALIDATION_CHANNEL)
+    try:
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            data = message["data"]
+            _apply_invalidation(data.decode() if isinstance(data, bytes) else data)
+    finally:
+        await pubsub.aclose()
+
+
+async def start_invalidation_listener(redis_url: str):
+    global _redis, _listener_task
+    _redis = aioredis.Redis.from_url(redis_url, socket_connect_timeout=2)
+    _listener_task = asyncio.create_task(_listen())
+
+
+async def stop_invalidation_listener():
+    global _redis, _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        _listener_task = None
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -0,0 +1,105 @@
+"""
+Celery worker liveness without dispatching tasks.
+
+Each worker runs a `WorkerHeartbeat` thread that writes a small JSON
+snapshot to `celery:heartbeat:<hostname>` every CELERY_HEARTBEAT_INTERVAL
+seconds: queue depth, reserved and active task counts and the lag of the
+worker's asyncio loop. The key expires if the worker stops, so the health
+prober only has to read the keys (`read_worker_heartbeats`).
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Optional
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CELERY_HEARTBEAT_INTERVAL = float(os.getenv("CELERY_HEARTBEAT_INTERVAL", 10))
+# Heartbeats older than this mean the worker is gone or wedged
+CELERY_HEARTBEAT_MAX_AGE = float(os.getenv("CELERY_HEARTBEAT_MAX_AGE", 30))
+# Loop lag above this marks the worker as degraded
+CELERY_LOOP_LAG_WARN_MS = float(os.getenv("CELERY_LOOP_LAG_WARN_MS", 500))
+HEARTBEAT_KEY_PREFIX = "celery:heartbeat:"
+# The broker Redis, which both the API and the workers can reach
+HEARTBEAT_REDIS_URL = os.getenv("CELERY_BROKER_URL") or os.getenv("REDIS_URL") \
+    or f"redis://{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', '6379')}/0"
+
+
+class WorkerHeartbeat:
+    def __init__(self, hostname: str, queues: list[str], loop: Optional[asyncio.AbstractEventLoop] = None, interval: float = CELERY_HEARTBEAT_INTERVAL):
+        self.hostname = hostname
+        self.queues = queues
+        self.loop = loop
+        self.interval = interval
+        self._redis = redis.Redis.from_url(HEARTBEAT_REDIS_URL, socket_connect_timeout=2, socket_timeout=2)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _loop_lag_ms(self) -> Optional[float]:
+        """Time for a no-op callback to run on the task loop; None without one."""
+        if self.loop is None or not self.loop.is_running():
+            return None
+        ran = threading.Event()
+        scheduled_at = time.perf_counter()
+        self.loop.call_soon_threadsafe(ran.set)
+        if not ran.wait(self.interval):
+            return self.interval * 1000
+        return round((time.perf_counter() - scheduled_at) * 1000, 2)
+
+    def sample(self) -> dict:
+        from celery.worker import state
+
+        queue_depth = 0
+        for queue in self.queues:
+            queue_depth += self._redis.llen(queue)
+        return {
+            "hostname": self.hostname,
+            "pid": os.getpid(),
+            "timestamp": time.time(),
+            "queue_depth": queue_depth,
+            "reserved": len(state.reserved_requests),
+            "active": len(state.active_requests),
+            "loop_lag_ms": self._loop_lag_ms(),
+        }
+
+    def beat(self):
+        self._redis.set(
+            HEARTBEAT_KEY_PREFIX + self.hostname,
+            json.dumps(self.sample()),
+            ex=int(CELERY_HEARTBEAT_MAX_AGE * 2),
+        )
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.beat()
+            except Exception as e:
+                print(f"Celery heartbeat failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="celery-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+        try:
+            self._redis.delete(HEARTBEAT_KEY_PREFIX + self.hostname)
+        except Exception:
+            pass
+        self._redis.close()
+
+
+async def read_worker_heartbeats(client) -> list[dict]:
+    """Every live worker's last heartbeat, read with an async Redis client."""
+    keys = [key async for key in client.scan_iter(match=HEARTBEAT_KEY_PREFIX + "*", count=100)]
+    if not keys:
+        return []
+    values = await client.mget(keys)
+    return [json.loads(value) for value in values if value]
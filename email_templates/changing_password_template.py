@@ -1,4 +1,5 @@
 from string import Template
+from email_templates.engine import EmailTemplate, RenderedEmail
 
 changing_password_template_string=Template("""
 <!DOCTYPE html>
@@ -117,6 +118,14 @@ changing_password_template_string=Template("""
 
 """)
 
+changing_password_email_template = EmailTemplate(
+    html=changing_password_template_string,
+    text="Hello, $email use $otp_code to reset your password.",
+)
+
+def render_changing_password_email(otp_code,user_email,avatar_image_link) -> RenderedEmail:
+    return changing_password_email_template.render(strict=False,otp_code=otp_code,email=user_email,avatar=avatar_image_link )
+
 def generate_changing_password_email_from_template(otp_code,user_email,avatar_image_link):
-    generated_email = changing_password_template_string.safe_substitute(otp_code=otp_code,email=user_email,avatar=avatar_image_link )
+    generated_email = changing_password_email_template.html.render(strict=False,otp_code=otp_code,email=user_email,avatar=avatar_image_link )
     return generated_email
\ No newline at end of file
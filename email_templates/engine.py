@@ -0,0 +1,80 @@
+from string import Template
+from typing import NamedTuple
+
+
+class RenderedEmail(NamedTuple):
+    html: str
+    text: str
+
+
+class CompiledTemplate:
+    """
+    A `string.Template` parsed once into static chunks and variable slots.
+
+    Rendering only joins the precomputed chunks with the substituted
+    values instead of re-scanning the whole (large) HTML on every call.
+    Supports the same `$name` / `${name}` / `$$` syntax as `string.Template`.
+    """
+
+    def __init__(self, template: Template | str):
+        if isinstance(template, str):
+            template = Template(template)
+        self.template = template
+        self._chunks, self._slots = self._compile(template)
+        self.placeholders = frozenset(name for name, _ in self._slots)
+
+    @staticmethod
+    def _compile(template: Template) -> tuple[list[str], list[tuple[str, str]]]:
+        text = template.template
+        chunks: list[str] = []
+        slots: list[tuple[str, str]] = []
+        current: list[str] = []
+        last = 0
+        for match in template.pattern.finditer(text):
+            current.append(text[last:match.start()])
+            last = match.end()
+            if match.group("escaped") is not None:
+                current.append(template.delimiter)
+                continue
+            name = match.group("named") or match.group("braced")
+            if name is None:
+                # Invalid placeholder: keep it literally, like safe_substitute
+                current.append(match.group())
+                continue
+            chunks.append("".join(current))
+            slots.append((name, match.group()))
+            current = []
+        current.append(text[last:])
+        chunks.append("".join(current))
+        return chunks, slots
+
+    def render(self, strict: bool = True, **values) -> str:
+        """
+        Args:
+            strict: Raise KeyError for a missing variable (like `substitute`);
+                    when False leave the placeholder as-is (like `safe_substitute`).
+        """
+        parts = [self._chunks[0]]
+        for (name, raw), chunk in zip(self._slots, self._chunks[1:]):
+            if name in values:
+                parts.append(str(values[name]))
+            elif strict:
+                raise KeyError(name)
+            else:
+                parts.append(raw)
+            parts.append(chunk)
+        return "".join(parts)
+
+
+class EmailTemplate:
+    """HTML and plain-text bodies of one email, compiled together and rendered with the same values."""
+
+    def __init__(self, html: Template | str, text: Template | str):
+        self.html = CompiledTemplate(html)
+        self.text = CompiledTemplate(text)
+
+    def render(self, strict: bool = True, **values) -> RenderedEmail:
+        return RenderedEmail(
+            html=self.html.render(strict=strict, **values),
+            text=self.text.render(strict=strict, **values),
+        )
@@ -1,4 +1,5 @@
 from string import Template
+from email_templates.engine import EmailTemplate, RenderedEmail
 # --- Invitation Email Template ---
 invitation_template_string = Template("""
 <!DOCTYPE html PUBLIC "-//W3C//DTD HTML 4.01 Transitional//EN" "http://www.w3.org/TR/html4/loose.dtd">
@@ -50,6 +51,27 @@ invitation_template_string = Template("""
 </html>
 """)
 
+invitation_email_template = EmailTemplate(
+    html=invitation_template_string,
+    text="Hello, ${invitee_email} you have been invited to use Aperture Security EPS Booking Admin Portal ",
+)
+
+def render_invitation_email(
+    invitee_email: str,
+    inviter_email: str,
+    project_name: str,
+    register_link: str
+) -> RenderedEmail:
+    """
+    Renders the HTML and plain-text parts of the invitation email.
+    """
+    return invitation_email_template.render(
+        invitee_email=invitee_email,
+        inviter_email=inviter_email,
+        project_name=project_name,
+        register_link=register_link
+    )
+
 def generate_invitation_email_from_template(
     invitee_email: str,
     inviter_email: str,
@@ -60,7 +82,7 @@ def generate_invitation_email_from_template(
     Generates an invitation email from a template, handling potential errors.
     """
     try:
-        return invitation_template_string.substitute(
+        return invitation_email_template.html.render(
             invitee_email=invitee_email,
             inviter_email=inviter_email,
             project_name=project_name,
@@ -1,4 +1,5 @@
 from string import Template
+from email_templates.engine import EmailTemplate, RenderedEmail
 import os
 from dotenv import load_dotenv
 
@@ -219,6 +220,17 @@ new_signin_warning_template_string=Template("""
 
 """)
 
+new_signin_warning_email_template = EmailTemplate(
+    html=new_signin_warning_template_string,
+    text="""Hello,
+
+This is an automated message sent to tell $firstName that there was a new sign in
+""",
+)
+
+def render_new_signin_warning_email(firstName,lastName,time_data,ip_address,location,extra_data) -> RenderedEmail:
+    return new_signin_warning_email_template.render(strict=False,DB_NAME=DB_NAME,helpful_img="https://iili.io/3DKqndN.jpg",firstName=firstName,lastName=lastName,time_data=time_data,ip_address=ip_address,location=location,extra_data=extra_data )
+
 def generate_new_signin_warning_email_from_template(firstName,lastName,time_data,ip_address,location,extra_data):
-    generated_email = new_signin_warning_template_string.safe_substitute(DB_NAME=DB_NAME,helpful_img="https://iili.io/3DKqndN.jpg",firstName=firstName,lastName=lastName,time_data=time_data,ip_address=ip_address,location=location,extra_data=extra_data )
+    generated_email = new_signin_warning_email_template.html.render(strict=False,DB_NAME=DB_NAME,helpful_img="https://iili.io/3DKqndN.jpg",firstName=firstName,lastName=lastName,time_data=time_data,ip_address=ip_address,location=location,extra_data=extra_data )
     return generated_email
\ No newline at end of file
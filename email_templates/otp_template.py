@@ -1,4 +1,5 @@
 from string import Template
+from email_templates.engine import EmailTemplate, RenderedEmail
 
 otp_template_string = Template("""
 <!DOCTYPE html PUBLIC "-//W3C//DTD HTML 4.01 Transitional//EN" "http://www.w3.org/TR/html4/loose.dtd">
@@ -50,12 +51,23 @@ otp_template_string = Template("""
 </html>
 """)
 
+otp_email_template = EmailTemplate(
+    html=otp_template_string,
+    text="Hello, ${user_email} use ${otp_code} to login  ",
+)
+
+def render_login_otp_email(otp_code: str, user_email: str) -> RenderedEmail:
+    """
+    Renders the HTML and plain-text parts of the OTP email.
+    """
+    return otp_email_template.render(otp_code=otp_code, user_email=user_email)
+
 def generate_login_otp_email_from_template(otp_code: str, user_email: str) -> str:
     """
     Generates an OTP email from a template, handling potential errors.
     """
     try:
-        return otp_template_string.substitute(
+        return otp_email_template.html.render(
             otp_code=otp_code,
             user_email=user_email
         )
@@ -1,4 +1,5 @@
 from string import Template
+from email_templates.engine import EmailTemplate, RenderedEmail
 import logging
 
 # --- Revoke Invitation Email Template ---
@@ -49,6 +50,25 @@ revoke_invitation_template_string = Template("""
 </html>
 """)
 
+revoke_invitation_email_template = EmailTemplate(
+    html=revoke_invitation_template_string,
+    text="Hello, ${revoked_user_email} your access has been revoked to use Aperture Security EPS Booking Admin Portal ",
+)
+
+def render_revoke_invitation_email(
+    revoked_user_email: str,
+    revoked_by_email: str,
+    project_name: str
+) -> RenderedEmail:
+    """
+    Renders the HTML and plain-text parts of the revocation email.
+    """
+    return revoke_invitation_email_template.render(
+        revoked_user_email=revoked_user_email,
+        revoked_by_email=revoked_by_email,
+        project_name=project_name
+    )
+
 def generate_revoke_invitation_email_from_template(
     revoked_user_email: str,
     revoked_by_email: str,
@@ -58,7 +78,7 @@ def generate_revoke_invitation_email_from_template(
     Generates an invitation revocation email from a template.
     """
     try:
-        return revoke_invitation_template_string.substitute(
+        return revoke_invitation_email_template.html.render(
             revoked_user_email=revoked_user_email,
             revoked_by_email=revoked_by_email,
             project_name=project_name
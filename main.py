@@ -1,31 +1,43 @@
 from bson import ObjectId
 from fastapi import Depends, FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
-from limits.strategies import FixedWindowRateLimiter
 from datetime import datetime,timedelta
-from limits.storage import RedisStorage
+from core.rate_limiter import AsyncFixedWindowRateLimiter
+from core.token_cache import start_invalidation_listener, stop_invalidation_listener
+from core.indexes import ensure_indexes
+from core.suggest import start_suggestion_index, stop_suggestion_index
+from core.response_cache import response_cache
+from core.conditional import make_etag, to_timestamp
+from core.range_streaming import gridfs_file_response
+from services.image_host import image_host_client
+from core.category_artwork import CATEGORY_ARTWORK_REFRESH_MINUTES, CATEGORY_ARTWORK_RELOAD_MINUTES, load_category_artwork, refresh_category_artwork
+from core.static_payloads import static_payloads
+from core.health import health_prober
+from core.metrics import MetricsMiddleware, metrics, render_prometheus
+from core.chunk_cache import chunk_cache
 import math
 from schemas.response_schema import APIResponse
-from repositories.tokens_repo import get_access_tokens_no_date_check
+from security.auth_context import get_auth_context
 from limits import parse
 import time   
 import os
 from celery_worker import celery_app
 from contextlib import asynccontextmanager
-from core.scheduler import scheduler
-from pymongo import MongoClient
+from core.scheduler import LOCAL_JOBSTORE, scheduler
 import redis
 from apscheduler.triggers.interval import IntervalTrigger
 from starlette.middleware.sessions import SessionMiddleware
-from security.auth import verify_admin_token
+from security.auth import verify_admin_token, verify_metrics_access
 from sub_app1.main import app as Node1
 from motor.motor_asyncio import AsyncIOMotorGridFSBucket
 from core.database import db
 fs = AsyncIOMotorGridFSBucket(db)
+fs_chunks = db["fs.chunks"]
 MONGO_URI = os.getenv("MONGO_URL")
+ENSURE_INDEXES_ON_STARTUP = os.getenv("ENSURE_INDEXES_ON_STARTUP", "0").lower() in ("1", "true", "yes")
 REDIS_URI = f"redis://{os.getenv('REDIS_HOST', '127.0.0.1')}:{os.getenv('REDIS_PORT', '6379')}/0"
 REDIS_HOST = os.getenv("REDIS_HOST", "127.0.0.1")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
@@ -49,35 +61,90 @@ async def lifespan(app:FastAPI):
         replace_existing=True
     )
 
+    # --- Category artwork: served from memory, looked up in the background ---
+    try:
+        await load_category_artwork()
+    except Exception as e:
+        print(f"Failed to load category artwork: {e}")
+    # --- Constant lookup payloads (categories, blog types, sort options) ---
+    static_payloads.rebuild()
+    scheduler.add_job(
+        refresh_category_artwork,
+        trigger=IntervalTrigger(minutes=CATEGORY_ARTWORK_REFRESH_MINUTES),
+        id="category_artwork_refresh",
+        name="Category Artwork Refresh",
+        replace_existing=True,
+        next_run_time=datetime.now()
+    )
+    # The refresh above runs in one worker; every worker picks its results up
+    scheduler.add_job(
+        load_category_artwork,
+        trigger=IntervalTrigger(minutes=CATEGORY_ARTWORK_RELOAD_MINUTES),
+        id="category_artwork_reload",
+        name="Category Artwork Reload",
+        jobstore=LOCAL_JOBSTORE,
+        replace_existing=True
+    )
+
     scheduler.start()
+    # --- Drop cached tokens revoked by any worker ---
+    await start_invalidation_listener(redis_url)
+    # --- Shared response cache for the public article routes ---
+    await response_cache.start(redis_url)
+    # --- Indexes are built once per deploy with `python -m core.indexes`;
+    #     ENSURE_INDEXES_ON_STARTUP=1 also does it here (e.g. local development) ---
+    if ENSURE_INDEXES_ON_STARTUP:
+        try:
+            await ensure_indexes()
+        except Exception as e:
+            print(f"Failed to ensure indexes: {e}")
+    # (Backfills for older blogs run once per deploy: `python -m core.migrations`)
+    # --- In-memory typeahead index (kept current through Redis pub/sub) ---
+    await start_suggestion_index(redis_url)
+    # --- Pooled connections to the image host ---
+    await image_host_client.start()
+    # --- Dependency probes; the health routes serve the last results ---
+    await health_prober.start(REDIS_URI)
+    # --- Per-worker metrics, shared through Redis for /metrics ---
+    await metrics.start(redis_url)
+    # --- Pooled SMTP delivery; imported here because it requires the EMAIL_* settings ---
+    try:
+        from services.email_service import email_queue
+    except EnvironmentError as e:
+        email_queue = None
+        print(f"Email delivery disabled: {e}")
+    else:
+        email_queue.start()
+        metrics.register_collector("email", lambda: email_queue.stats)
     try:
         yield
     finally:
+        # Sends what is still queued before the worker exits
+        if email_queue is not None:
+            await email_queue.stop()
         scheduler.shutdown()
+        await stop_invalidation_listener()
+        await stop_suggestion_index()
+        await response_cache.stop()
+        await image_host_client.aclose()
+        await health_prober.stop()
+        await metrics.stop()
+        # Drops this worker's spilled video chunks
+        chunk_cache.clear()
+        await limiter.close()
     
 
-class RequestTimingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Record the start time before processing the request
-        start_time = time.time()
-        
-        # Process the request and get the response
-        response = await call_next(request)
-        
-        # Calculate the time taken to process the request
-        process_time = time.time() - start_time
-        
-        # You can log the time or set it in the response headers
-        response.headers['X-Process-Time'] = str(process_time)
-        
-        # Optionally, print it for logging purposes
-        print(f"Request to {request.url} took {process_time:.6f} seconds")
-        
-        return response
-    
-    
-    
-    
+# --- Subsystem counters exported next to the request metrics ---
+metrics.register_collector("response_cache", lambda: response_cache.stats)
+metrics.register_collector("image_host", lambda: image_host_client.stats)
+# The hit ratio can't be summed across workers; it follows from the hit and miss counts
+metrics.register_collector(
+    "video_chunk_cache",
+    lambda: {key: value for key, value in chunk_cache.snapshot().items() if key != "hit_ratio"},
+    gauges=("memory_bytes", "memory_chunks", "disk_bytes", "disk_chunks"),
+)
+
+
 # Create the FastAPI app
 app = FastAPI(
     
@@ -86,18 +153,13 @@ app = FastAPI(
     summary="THIS IS JUST A TEST TO SEE IF AUTOMATED DEPLOYMENT IS WORKING"
      
 )
-app.add_middleware(RequestTimingMiddleware)
 app.add_middleware(SessionMiddleware, secret_key="some-random-string")
 redis_url = os.getenv("CELERY_BROKER_URL") or os.getenv("REDIS_URL") \
     or f"redis://{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', '6379')}/0"
 
 
-# Setup limiter
-storage = RedisStorage(
-   redis_url
-)
-
-limiter = FixedWindowRateLimiter(storage)
+# Setup limiter (hit + window stats in a single non-blocking round trip)
+limiter = AsyncFixedWindowRateLimiter(redis_url)
 
 RATE_LIMITS = {
    "annonymous": parse("220/minute"),  # <-- CHANGED FROM 20
@@ -108,19 +170,17 @@ RATE_LIMITS = {
 async def get_user_type(request: Request) -> tuple[str, str]:
     """
     Return a tuple of (user_identifier, user_type)
-    You can extract from JWT, headers, or session.
+    Resolved through the request's AuthContext so the auth dependencies
+    reuse the same decoded token and lookups later in the request.
     """
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
+    auth_context = get_auth_context(request)
+    access_token = await auth_context.access_token_no_date_check()
+    if access_token is None:
         ip_address = request.headers.get("X-Forwarded-For", request.client.host)
         user_id = ip_address
         user_type="annonymous"
         return user_id, user_type if user_type in RATE_LIMITS else "annonymous"
     
-    
-    token = auth_header.split(" ")[1] 
-    access_token  =await get_access_tokens_no_date_check(accessToken=token)
-    
     user_id = access_token.userId
     
     user_type = access_token.role
@@ -133,11 +193,8 @@ class RateLimitingMiddleware(BaseHTTPMiddleware):
         user_id, user_type = await get_user_type(request)
         rate_limit_rule = RATE_LIMITS[user_type]
 
-        # hit() → True if still under limit
-        allowed = limiter.hit(rate_limit_rule, user_id)
-
-        # Get current window stats (reset_time, remaining)
-        reset_time, remaining = limiter.get_window_stats(rate_limit_rule, user_id)
+        # hit() → (allowed, remaining, reset_time) from one Lua call
+        allowed, remaining, reset_time = await limiter.hit(rate_limit_rule, user_id)
         seconds_until_reset = max(math.ceil(reset_time - time.time()), 0)
 
         if not allowed:
@@ -186,6 +243,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so rate-limited and CORS-rejected requests are timed too
+app.add_middleware(MetricsMiddleware)
 
 # Custom exception handler for HTTPExceptions
 @app.exception_handler(HTTPException)
@@ -196,7 +255,8 @@ async def custom_http_exception_handler(request: Request, exc: HTTPException):
             status_code=exc.status_code,
             data=None,
             detail=exc.detail,
-        ).dict()
+        ).dict(),
+        headers=exc.headers
     )
 
 async def test_scheduler(message):
@@ -212,121 +272,17 @@ def read_root():
 
 
 # Clients
-mongo_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=2000)
 redis_client = redis.Redis.from_url(REDIS_URI, socket_connect_timeout=2)
 # Health check route
+# (Both health routes read the background prober's last snapshot; see core/health.py)
 @app.get("/health",tags=["Health"])
 async def health_check():
-    overall_status = "healthy"
-    services = {}
-
-    # --- MongoDB Check ---
-    start_time = time.perf_counter()
-    try:
-        mongo_client.admin.command("ping")
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        services["mongo"] = {
-            "status": "healthy",
-            "latency_ms": latency,
-            "message": "MongoDB ping successful"
-        }
-    except Exception as e:
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        services["mongo"] = {
-            "status": "unhealthy",
-            "latency_ms": latency,
-            "message": str(e)
-        }
-        overall_status = "degraded"
-
-    # --- Redis Check ---
-    start_time = time.perf_counter()
-    try:
-        redis_client.ping()
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        services["redis"] = {
-            "status": "healthy",
-            "latency_ms": latency,
-            "message": "Redis ping successful"
-        }
-    except Exception as e:
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        services["redis"] = {
-            "status": "unhealthy",
-            "latency_ms": latency,
-            "message": str(e)
-        }
-        overall_status = "degraded"
-
-    # --- Worker (Heartbeat) Check ---
-    start_time = time.perf_counter()
-    # Check APScheduler
-    try:
-        aps_heartbeat = redis_client.get("apscheduler:heartbeat")
-        if aps_heartbeat:
-            last_seen = float(aps_heartbeat)
-            age = time.time() - last_seen
-            if age <= 30:
-                services["apscheduler"] = {
-                    "status": "healthy",
-                    "latency_ms": 0,
-                    "message": f"Last heartbeat {int(age)}s ago"
-                }
-            else:
-                services["apscheduler"] = {
-                    "status": "degraded",
-                    "latency_ms": 0,
-                    "message": f"Stale heartbeat (last seen {int(age)}s ago)"
-                }
-                overall_status = "degraded"
-        else:
-            services["apscheduler"] = {
-                "status": "unhealthy",
-                "latency_ms": 0,
-                "message": "No heartbeat found"
-            }
-            overall_status = "degraded"
-    except Exception as e:
-        services["apscheduler"] = {
-            "status": "unhealthy",
-            "latency_ms": 0,
-            "message": str(e)
-        }
-        overall_status = "degraded"
-
-    # --- Final Structured Response ---
-    data = {
-        "status": overall_status,
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
-        "services": services
+    snapshot = await health_prober.get_snapshot()
+    services = {
+        name: {key: value for key, value in service.items() if key != "description"}
+        for name, service in snapshot["services"].items()
     }
-     # --- Celery health check ---
-    try:
-        result = celery_app.send_task("celery_worker.test_scheduler", args=["Health check ping"])
-        response = result.get(timeout=5)
-        services["celery"] = {
-            "status": "healthy",
-            "latency_ms": 0,
-            "message": f"Worker response received successfully",
-            "task_id": result.id
-        }
-    except TimeoutError:
-        services["celery"] = {
-            "status": "unhealthy",
-            "latency_ms": 0,
-            "message": "Celery task timed out"
-        }
-        overall_status = "degraded"
-    except Exception as e:
-        services["celery"] = {
-            "status": "unhealthy",
-            "latency_ms": 0,
-            "message": str(e)
-        }
-        overall_status = "degraded"
-
-    # --- Final response ---
-
+    overall_status = "healthy" if snapshot["status"] == "healthy" else "degraded"
 
     return APIResponse(
         status_code=200 if overall_status == "healthy" else 207,
@@ -335,6 +291,22 @@ async def health_check():
     )
 
 
+@app.get(
+    "/metrics",
+    tags=["Health"],
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(verify_metrics_access)],
+)
+async def metrics_export():
+    """
+    Prometheus text exposition, summed over every API worker process.
+    Needs an admin token, or `Authorization: Bearer $METRICS_TOKEN` for scrapers.
+    """
+    snapshots, workers = await metrics.gather_snapshots()
+    return PlainTextResponse(render_prometheus(snapshots, workers), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/task/{task_id}",tags=["Tasks"])
 def get_task_status(task_id: str):
     result = celery_app.AsyncResult(task_id)
@@ -354,174 +326,18 @@ def get_task_status(task_id: str):
     return response
 
 @app.get("/health-detailed",tags=["Health"], summary="Performs a detailed health check of all integrated services")
-async def health_check():
-    services = {}
-    # This list will track the status of all services
-    service_statuses = [] 
-    
- 
-
-    # --- MongoDB Check ---
-    service_name = "mongo"
-    service_desc = "Primary Database (MongoDB)"
-    start_time = time.perf_counter()
-    try:
-        mongo_client.admin.command("ping")
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        status = "healthy"
-        services[service_name] = {
-            "description": service_desc,
-            "status": status,
-            "latency_ms": latency,
-            "message": "Connection successful and ping acknowledged."
-        }
-    except Exception as e:
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        status = "unhealthy"
-        services[service_name] = {
-            "description": service_desc,
-            "status": status,
-            "latency_ms": latency,
-            "message": f"Connection failed: {str(e)}"
-        }
-    service_statuses.append(status)
-
-    # --- Redis Check ---
-    service_name = "redis"
-    service_desc = "Cache & Message Broker (Redis)"
-    start_time = time.perf_counter()
-    try:
-        redis_client.ping()
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        status = "healthy"
-        services[service_name] = {
-            "description": service_desc,
-            "status": status,
-            "latency_ms": latency,
-            "message": "Connection successful and ping acknowledged."
-        }
-    except Exception as e:
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        status = "unhealthy"
-        services[service_name] = {
-            "description": service_desc,
-            "status": status,
-            "latency_ms": latency,
-            "message": f"Connection failed: {str(e)}"
-        }
-    service_statuses.append(status)
-
-    # --- APScheduler (Heartbeat) Check ---
-    service_name = "apscheduler"
-    service_desc = "Internal Job Scheduler (APScheduler)"
-    start_time = time.perf_counter()
-    try:
-        # Check for the heartbeat key set by the scheduler
-        aps_heartbeat = redis_client.get("apscheduler:heartbeat")
-        latency = round((time.perf_counter() - start_time) * 1000, 2) # Latency of the check itself
-        
-        if aps_heartbeat:
-            last_seen = float(aps_heartbeat)
-            age = time.time() - last_seen
-            
-            if age <= 30: # Healthy if heartbeat is within 30 seconds
-                status = "healthy"
-                message = f"Scheduler is active. Last heartbeat {int(age)}s ago."
-            else: # Degraded if heartbeat is stale
-                status = "degraded"
-                message = f"Stale heartbeat. Last seen {int(age)}s ago. Scheduler may be stuck or overloaded."
-            
-            services[service_name] = {
-                "description": service_desc,
-                "status": status,
-                "latency_ms": latency,
-                "message": message
-            }
-        else: # Unhealthy if no heartbeat key is found
-            status = "unhealthy"
-            services[service_name] = {
-                "description": service_desc,
-                "status": status,
-                "latency_ms": latency,
-                "message": "No heartbeat found. Scheduler may be down or has not run yet."
-            }
-    except Exception as e:
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        status = "unhealthy"
-        services[service_name] = {
-            "description": service_desc,
-            "status": status,
-            "latency_ms": latency,
-            "message": f"Failed to check scheduler heartbeat: {str(e)}"
-        }
-    service_statuses.append(status)
-
-    # --- Celery Worker Check ---
-    # This check is now run *before* the final response is built
-    service_name = "celery"
-    service_desc = "Background Task Worker (Celery)"
-    start_time = time.perf_counter()
-    task_id = None
-    try:
-        result = celery_app.send_task("celery_worker.test_scheduler", args=["Health check ping"])
-        task_id = result.id
-        # Wait for 5 seconds for the worker to respond
-        response = result.get(timeout=5) 
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        status = "healthy"
-        services[service_name] = {
-            "description": service_desc,
-            "status": status,
-            "latency_ms": latency, # Now captures actual task round-trip time
-            "message": f"Worker task executed successfully. Response: '{response}'",
-            "task_id": task_id
-        }
-    except TimeoutError:
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        status = "unhealthy"
-        services[service_name] = {
-            "description": service_desc,
-            "status": status,
-            "latency_ms": latency, # Will be ~5000+
-            "message": "Celery task timed out after 5 seconds. Worker may be busy or down.",
-            "task_id": task_id
-        }
-    except Exception as e:
-        latency = round((time.perf_counter() - start_time) * 1000, 2)
-        status = "unhealthy"
-        services[service_name] = {
-            "description": service_desc,
-            "status": status,
-            "latency_ms": latency,
-            "message": f"Celery task failed to execute: {str(e)}",
-            "task_id": task_id
-        }
-    service_statuses.append(status)
-
-    # --- Determine Overall Status ---
- 
-    if "unhealthy" in service_statuses:
-        overall_status = "unhealthy"
-    elif "degraded" in service_statuses:
-        overall_status = "degraded"
-    else:
-        overall_status = "healthy"
-
-    # --- Final Structured Response ---
- 
+async def detailed_health_check():
+    snapshot = await health_prober.get_snapshot()
+    overall_status = snapshot["status"]
     data = {
         "status": overall_status,
-        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), # Using ISO 8601 format
-        "services": services
+        "timestamp": snapshot["timestamp"],
+        "age_seconds": round(time.time() - snapshot["checked_at"], 1),
+        "services": snapshot["services"]
     }
-    
-    # --- Final response ---
-     
-    http_status_code = 200 if overall_status == "healthy" else 207
 
-   
     return APIResponse(
-        status_code=http_status_code,
+        status_code=200 if overall_status == "healthy" else 207,
         detail=f"Health check completed with status: {overall_status}",
         data=data  
     )
@@ -532,17 +348,27 @@ async def health_check():
 # ------------------------------
 
 @app.get("/videos/{video_id}")
-async def get_video(video_id: str):
+async def get_video(video_id: str, request: Request):
+    if not ObjectId.is_valid(video_id):
+        raise HTTPException(status_code=404, detail="Video not found")
     try:
-        # NOT awaited
+        # Only reads the files entry; chunks are fetched as the response streams
         download_stream = await fs.open_download_stream(ObjectId(video_id))
-
-        return StreamingResponse(
-            download_stream,
-            media_type=download_stream.metadata.get("content_type", "video/mp4")
-        )
     except Exception:
         raise HTTPException(status_code=404, detail="Video not found")
+
+    # GridFS files never change in place, so id + length + uploadDate is a strong validator
+    last_modified = to_timestamp(download_stream.upload_date)
+    etag = make_etag(video_id, download_stream.length, last_modified)
+    metadata = download_stream.metadata or {}
+    return gridfs_file_response(
+        request,
+        download_stream,
+        etag,
+        last_modified,
+        media_type=metadata.get("content_type", "video/mp4"),
+        chunks_collection=fs_chunks,
+    )
     
 app.mount("/api/v1", Node1)
 # --- auto-routes-start ---
@@ -8,16 +8,100 @@
 # DO NOT EDIT THIS FILE MANUALLY - RE-RUN THE GENERATOR INSTEAD. OR IF YOU WANT TO EDIT JUST ADD LEAVE OTHER FUNCTIONS THE WAY YOU MET THEM
 # ============================================================================
 
+import base64
+import binascii
+import json
+import os
+import time
+from bson import ObjectId
+from bson.errors import InvalidId
 from pymongo import ReturnDocument
 from core.database import db
+from core.projections import projection_for
+from core.search import search_terms_for
+from core.suggest import publish_blog_removal, publish_blog_upsert
 from fastapi import HTTPException,status
-from typing import List,Optional
-from schemas.blog import BlogOutLessDetail, BlogUpdate, BlogCreate, BlogOut
+from typing import List,Optional,Tuple
+from schemas.blog import BlogOutLessDetail, BlogUpdate, BlogCreate, BlogOut, _excerpt_source
+from schemas.imports import Page
+
+# How long a total count for a given filter is reused before recounting
+BLOG_COUNT_CACHE_TTL_SECONDS = int(os.getenv("BLOG_COUNT_CACHE_TTL_SECONDS", 60))
+_blog_count_cache: dict[str, Tuple[int, float]] = {}
+
+
+async def count_blogs(filter_dict: Optional[dict] = None) -> int:
+    """
+    `count_documents` for a filter, cached for BLOG_COUNT_CACHE_TTL_SECONDS.
+    Writes through this repository drop the cache immediately.
+    """
+    filter_dict = filter_dict or {}
+    key = json.dumps(filter_dict, sort_keys=True, default=str)
+    cached = _blog_count_cache.get(key)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    total = await db.blogs.count_documents(filter_dict)
+    _blog_count_cache[key] = (total, time.monotonic() + BLOG_COUNT_CACHE_TTL_SECONDS)
+    return total
+
+
+def clear_blog_count_cache():
+    _blog_count_cache.clear()
+
+
+def encode_blog_cursor(doc: dict, sort_field: str, sort_order: int) -> str:
+    """Opaque cursor pointing just after `doc` in the (sort_field, _id) ordering."""
+    payload = {"f": sort_field, "o": sort_order, "v": doc.get(sort_field), "id": str(doc["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_blog_cursor(cursor: str, sort_field: str, sort_order: int) -> Tuple[object, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        if payload["f"] != sort_field or payload["o"] != sort_order:
+            raise ValueError("cursor was issued for a different sort")
+        return payload["v"], ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId, binascii.Error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid pagination cursor: {str(e)}"
+        )
+
+
+def _after_cursor_filter(sort_field: str, sort_order: int, value, last_id: ObjectId) -> dict:
+    """
+    Matches documents that sort strictly after (value, last_id).
+    Missing/null sort values sort lowest in MongoDB, so they come last when
+    descending and first when ascending.
+    """
+    id_op = "$lt" if sort_order == -1 else "$gt"
+    if value is None:
+        same_value = {sort_field: None, "_id": {id_op: last_id}}
+        if sort_order == -1:
+            return same_value
+        return {"$or": [{sort_field: {"$ne": None}}, same_value]}
+
+    value_op = "$lt" if sort_order == -1 else "$gt"
+    branches = [
+        {sort_field: {value_op: value}},
+        {sort_field: value, "_id": {id_op: last_id}},
+    ]
+    if sort_order == -1:
+        branches.append({sort_field: None})
+    return {"$or": branches}
+
+
+def _search_terms(doc: dict) -> list[str]:
+    return search_terms_for(doc.get("title"), (doc.get("author") or {}).get("name"), doc.get("excerpt"))
 
 async def create_blog(blog_data: BlogCreate) -> BlogOut:
     blog_dict = blog_data.model_dump()
+    blog_dict["search_terms"] = _search_terms(blog_dict)
     result =await db.blogs.insert_one(blog_dict)
+    clear_blog_count_cache()
     result = await db.blogs.find_one(filter={"_id":result.inserted_id})
+    await publish_blog_upsert(result)
     returnable_result = BlogOut(**result)
     return returnable_result
 
@@ -41,7 +125,8 @@ async def get_blogs(
     start: int = 0,
     stop: int = 100,
     sort_field: Optional[str] = None,
-    sort_order: Optional[int] = None  # 1 for ascending, -1 for descending
+    sort_order: Optional[int] = None,  # 1 for ascending, -1 for descending
+    include_total: bool = False
 ) -> List[BlogOutLessDetail]:
     """
     Retrieves blogs from the MongoDB collection with optional filtering,
@@ -53,6 +138,7 @@ async def get_blogs(
         stop (int): Stop index for pagination.
         sort_field (str, optional): Field to sort by.
         sort_order (int, optional): 1 for ascending, -1 for descending.
+        include_total (bool): Set `totalItems` on each blog (cached count).
 
     Returns:
         List[BlogOut]: List of blog objects sorted by the given field.
@@ -65,8 +151,8 @@ async def get_blogs(
             filter_dict = {}
 
         # Base query
-        cursor = db.blogs.find(filter_dict)
-        total_blogs = await db.blogs.count_documents(filter_dict)
+        cursor = db.blogs.find(filter_dict, projection_for(BlogOutLessDetail))
+        total_blogs = await count_blogs(filter_dict) if include_total else None
         # Apply sorting
         if sort_field and sort_order:
             cursor = cursor.sort(sort_field, sort_order)
@@ -94,14 +180,136 @@ async def get_blogs(
             detail=f"An error occurred while fetching blogs: {str(e)}"
         )
 
+def blog_page_query(
+    filter_dict: dict,
+    sort_field: str,
+    sort_order: int,
+    cursor: Optional[str] = None
+) -> Tuple[dict, list]:
+    """
+    The (filter, sort) `get_blogs_page` runs. Also used by `python -m
+    core.indexes --check`, so the checked shapes are the issued ones.
+    """
+    query = filter_dict
+    if cursor:
+        value, last_id = decode_blog_cursor(cursor, sort_field, sort_order)
+        after = _after_cursor_filter(sort_field, sort_order, value, last_id)
+        query = {"$and": [filter_dict, after]} if filter_dict else after
+    return query, [(sort_field, sort_order), ("_id", sort_order)]
+
+async def get_blogs_page(
+    filter_dict: Optional[dict] = None,
+    start: int = 0,
+    stop: int = 100,
+    sort_field: str = "date_created",
+    sort_order: int = -1,
+    cursor: Optional[str] = None
+) -> Tuple[List[BlogOutLessDetail], Optional[str]]:
+    """
+    Keyset-paginated variant of `get_blogs`.
+
+    Without a cursor the page starts at `start` (skip); with a cursor it
+    continues right after the last blog of the previous page using the
+    (sort_field, _id) index, so every following page costs the same as the
+    first. `stop - start` is the page size either way.
+
+    Returns:
+        (blogs, next_cursor): next_cursor is None on the last page.
+    """
+    try:
+        if filter_dict is None:
+            filter_dict = {}
+        limit = max(stop - start, 0)
+        if limit == 0:
+            return [], None
+
+        query, sort = blog_page_query(filter_dict, sort_field, sort_order, cursor)
+        # The sort field is needed for the cursor even if the list model lacks it
+        projection = {**projection_for(BlogOutLessDetail), sort_field: 1}
+        db_cursor = db.blogs.find(query, projection).sort(sort)
+        if not cursor:
+            db_cursor = db_cursor.skip(start)
+        # One extra document tells us whether there is a next page
+        docs = await db_cursor.limit(limit + 1).to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_blog_cursor(docs[-1], sort_field, sort_order)
+
+        blog_list = []
+        for itemIndex, doc in enumerate(docs, start=1):
+            blog_doc = BlogOutLessDetail(**doc)
+            blog_doc.itemIndex = itemIndex
+            blog_list.append(blog_doc)
+        return blog_list, next_cursor
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching blogs: {str(e)}"
+        )
+
+async def backfill_blog_excerpts() -> int:
+    """
+    Stores an excerpt on blogs written before excerpts were computed at
+    write time, so list projections (which skip the bodies) still show one.
+
+    Returns:
+        int: Number of blogs updated.
+    """
+    updated = 0
+    placeholder = "Article content is currently empty."
+    cursor = db.blogs.find(
+        {"excerpt": {"$in": [None, placeholder]}},
+        {"currentPageBody": 1, "pages": 1},
+    )
+    async for doc in cursor:
+        pages = [Page(**page) for page in doc.get("pages") or []]
+        excerpt = BlogCreate._generate_excerpt(_excerpt_source(doc.get("currentPageBody"), pages))
+        await db.blogs.update_one({"_id": doc["_id"]}, {"$set": {"excerpt": excerpt}})
+        updated += 1
+    return updated
+
+async def backfill_blog_search_terms() -> int:
+    """
+    Stores `search_terms` (used for prefix search) on blogs written before
+    they were computed at write time.
+
+    Returns:
+        int: Number of blogs updated.
+    """
+    updated = 0
+    cursor = db.blogs.find(
+        {"search_terms": {"$exists": False}},
+        {"title": 1, "author.name": 1, "excerpt": 1},
+    )
+    async for doc in cursor:
+        await db.blogs.update_one({"_id": doc["_id"]}, {"$set": {"search_terms": _search_terms(doc)}})
+        updated += 1
+    return updated
+
 async def update_blog(filter_dict: dict, blog_data: BlogUpdate) -> BlogOut:
+    changes = blog_data.model_dump(exclude_none=True)
     result = await db.blogs.find_one_and_update(
         filter_dict,
-        {"$set": blog_data.model_dump(exclude_none=True)},
+        {"$set": changes},
         return_document=ReturnDocument.AFTER
     )
+    clear_blog_count_cache()
+    if result is not None and changes.keys() & {"title", "author", "excerpt"}:
+        result["search_terms"] = _search_terms(result)
+        await db.blogs.update_one({"_id": result["_id"]}, {"$set": {"search_terms": result["search_terms"]}})
+    if result is not None:
+        await publish_blog_upsert(result)
     returnable_result = BlogOut(**result)
     return returnable_result
 
 async def delete_blog(filter_dict: dict):
-    return await db.blogs.delete_one(filter_dict)
\ No newline at end of file
+    result = await db.blogs.delete_one(filter_dict)
+    clear_blog_count_cache()
+    if result.deleted_count and "_id" in filter_dict:
+        await publish_blog_removal(str(filter_dict["_id"]))
+    return result
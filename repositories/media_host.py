@@ -4,9 +4,13 @@
 
 # ============================================================================
 
+import hashlib
 import os
+import time
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from core.database import db
+from core.task_database import task_db
 from fastapi import HTTPException, UploadFile,status
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorGridFSBucket
@@ -15,23 +19,24 @@ from typing import List,Optional
 
 
 fs = AsyncIOMotorGridFSBucket(db)
+# Uploads are copied into GridFS this many bytes at a time, never whole
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
  
 
-async def create_media(media_data: MediaCreate) -> MediaOut:
-    from motor.motor_asyncio import AsyncIOMotorClient
-
-    DB = os.getenv("DB_NAME")
-    MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-
-    client = AsyncIOMotorClient(MONGO_URL)
-    db = client[DB]
+async def create_media(media_data: MediaCreate, database=None) -> MediaOut:
+    # Runs in the Celery worker on the worker's shared client unless the API passes its own
+    db = task_db.database() if database is None else database
     media_dict = media_data.model_dump()
     result =await db.media.insert_one(media_dict)
     result = await db.media.find_one(filter={"_id":result.inserted_id})
     returnable_result = MediaOut(**result)
     return returnable_result
 
+async def get_media_validators(filter_dict: dict) -> Optional[dict]:
+    """Only `last_updated` of a media document, for conditional GETs."""
+    return await db.media.find_one(filter_dict, {"last_updated": 1})
+
 async def get_media(filter_dict: dict) -> Optional[MediaOut]:
     try:
         result = await db.media.find_one(filter_dict)
@@ -89,8 +94,9 @@ async def get_media_files(
             detail=f"An error occurred while fetching media: {str(e)}"
         )
 
-async def update_media_category(filter_dict: dict, media_data: MediaUpdate) -> MediaOut:
-    result = await db.media.find_one_and_update(
+async def update_media_category(filter_dict: dict, media_data: MediaUpdate, database=None) -> MediaOut:
+    database = db if database is None else database
+    result = await database.media.find_one_and_update(
         filter_dict,
         {"$set": media_data.model_dump(exclude_none=True)},
         return_document=ReturnDocument.AFTER
@@ -101,27 +107,32 @@ async def update_media_category(filter_dict: dict, media_data: MediaUpdate) -> M
 async def delete_media(filter_dict: dict):
     return await db.media.delete_one(filter_dict)
 
-async def save_video_to_mongodb(file: UploadFile) -> str:
-
+async def stream_upload_to_gridfs(file: UploadFile, metadata: Optional[dict] = None) -> ObjectId:
+    """
+    Copies an upload into GridFS UPLOAD_CHUNK_SIZE bytes at a time, so memory
+    stays bounded whatever the file size. Returns the GridFS file id.
+    """
     upload_stream = fs.open_upload_stream(
         file.filename,
-        metadata={"content_type": file.content_type}
+        metadata={"content_type": file.content_type, **(metadata or {})}
     )
-
-    # 2. Write file in chunks
-    while True:
-        chunk = await file.read(1024 * 1024)  # 1 MB chunks
-        if not chunk:
-            break
-        await upload_stream.write(chunk)
-
-    # 3. Close stream
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            await upload_stream.write(chunk)
+    except Exception:
+        await upload_stream.abort()
+        raise
     await upload_stream.close()
+    return upload_stream._id
 
-    # 4. Get the object ID of the uploaded file
-    video_id = upload_stream._id
 
-    # 5. Return a URL to access the video
+async def save_video_to_mongodb(file: UploadFile) -> str:
+    video_id = await stream_upload_to_gridfs(file)
+
+    # Return a URL to access the video
     return f"/videos/{str(video_id)}"
 
 
@@ -131,14 +142,7 @@ async def save_video_to_mongodb_from_bytes(
     filename: str,
     content_type: str
 ) -> str:
-    from motor.motor_asyncio import AsyncIOMotorClient
-
-    DB = os.getenv("DB_NAME")
-    MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-
-    client = AsyncIOMotorClient(MONGO_URL)
-    db = client[DB]
-    fs = AsyncIOMotorGridFSBucket(db)
+    fs = task_db.gridfs()
     # 1. Create GridFS upload stream
     upload_stream = fs.open_upload_stream(
         filename,
@@ -159,4 +163,69 @@ async def save_video_to_mongodb_from_bytes(
     video_id = upload_stream._id
 
     # 5. Return URL to the video
-    return f"/videos/{str(video_id)}"
\ No newline at end of file
+    return f"/videos/{str(video_id)}"
+
+
+async def read_staged_upload(file_id: str) -> bytes:
+    """
+    Reads an upload that the API staged in GridFS (see `stream_upload_to_gridfs`).
+    Used by the worker for images, which the image host needs in one piece
+    anyway. The staged file is kept until `delete_staged_upload`, so a failed
+    task can be retried.
+    """
+    download_stream = await task_db.gridfs().open_download_stream(ObjectId(file_id))
+    return await download_stream.read()
+
+
+async def delete_staged_upload(file_id: str):
+    await task_db.gridfs().delete(ObjectId(file_id))
+
+
+async def hash_upload(file: UploadFile) -> tuple[str, int]:
+    """
+    SHA-256 and size of an upload, read UPLOAD_CHUNK_SIZE bytes at a time
+    from Starlette's spool file, then rewound so it can still be stored.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    await file.seek(0)
+    return digest.hexdigest(), size
+
+
+async def get_asset_by_hash(content_hash: str, database=None) -> Optional[dict]:
+    database = db if database is None else database
+    return await database.media_hashes.find_one({"hash": content_hash})
+
+
+async def save_asset_hash(content_hash: str, url: str, media_type: str, size: int, database=None) -> dict:
+    """
+    Maps `content_hash` to the URL it was stored under. If a concurrent upload
+    of the same content got there first, its record is returned instead and
+    the caller should use that URL.
+    """
+    database = db if database is None else database
+    record = {
+        "hash": content_hash,
+        "url": url,
+        "mediaType": media_type,
+        "size": size,
+        "date_created": int(time.time()),
+    }
+    try:
+        await database.media_hashes.insert_one(record)
+        return record
+    except DuplicateKeyError:
+        return await database.media_hashes.find_one({"hash": content_hash})
+
+
+async def delete_gridfs_file(video_url: str):
+    """Removes the GridFS file behind a `/videos/<id>` URL."""
+    file_id = video_url.rsplit("/", 1)[-1]
+    if ObjectId.is_valid(file_id):
+        await fs.delete(ObjectId(file_id))
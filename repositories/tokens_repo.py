@@ -8,6 +8,25 @@ from bson import ObjectId,errors
 from fastapi import HTTPException
 from repositories.admin_repo import get_admin
 from security.encrypting_jwt import decode_jwt_token_without_expiration
+from core.token_cache import token_cache, publish_invalidation
+
+# Only the fields the auth checks need are cached per token id
+CACHED_TOKEN_FIELDS = {"userId": 1, "role": 1, "status": 1, "dateCreated": 1}
+
+
+async def find_access_token_by_id(object_id: ObjectId) -> dict | None:
+    """
+    Looks up an access token document by id, going through the in-process
+    token cache first so hot auth paths skip the `accessToken` find_one.
+    """
+    token_id = str(object_id)
+    token = token_cache.get(token_id)
+    if token is not None:
+        return token
+    token = await db.accessToken.find_one({"_id": object_id}, CACHED_TOKEN_FIELDS)
+    if token:
+        token_cache.set(token_id, token)
+    return token
 
 async def add_access_tokens(token_data:accessTokenCreate)->accessTokenOut:
     token = token_data.model_dump()
@@ -31,6 +50,7 @@ async def add_admin_access_tokens(token_data:accessTokenCreate)->accessTokenOut:
 
 async def update_admin_access_tokens(token:str)->accessTokenOut:
     updatedToken= await db.accessToken.find_one_and_update(filter={"_id":ObjectId(token)},update={"$set": {'status':'active'}},return_document=True)
+    await publish_invalidation("token", token)
     accessToken = accessTokenOut(**updatedToken)
     return accessToken
     
@@ -44,6 +64,7 @@ async def add_refresh_tokens(token_data:refreshTokenCreate)->refreshTokenOut:
 async def delete_access_token(accessToken):
     # await db.refreshToken.delete_many({"previousAccessToken":accessToken})
     await db.accessToken.find_one_and_delete({'_id':ObjectId(accessToken)})
+    await publish_invalidation("token", str(accessToken))
     
     
 async def delete_refresh_token(refreshToken:str):
@@ -79,7 +100,7 @@ def is_older_than_days(date_value, days=10):
 
 async def get_access_tokens(accessToken:str)->accessTokenOut:
     
-    token = await db.accessToken.find_one({"_id": ObjectId(accessToken)})
+    token = await find_access_token_by_id(ObjectId(accessToken))
     if token:
         if is_older_than_days(date_value=token['dateCreated'])==False:
             if token.get("role",None)=="member":
@@ -105,7 +126,7 @@ async def get_access_tokens(accessToken:str)->accessTokenOut:
     
 async def get_admin_access_tokens(accessToken:str)->accessTokenOut:
     
-    token = await db.accessToken.find_one({"_id": ObjectId(accessToken)})
+    token = await find_access_token_by_id(ObjectId(accessToken))
     print(token)
     if token:
         if is_older_than_days(date_value=token['dateCreated'])==False:
@@ -142,7 +163,7 @@ async def get_access_tokens_no_date_check(accessToken: str) -> accessTokenOut |
     try:
         # Try interpreting the token as an ObjectId
         object_id = ObjectId(accessToken)
-        token = await db.accessToken.find_one({"_id": object_id})
+        token = await find_access_token_by_id(object_id)
     except (InvalidId, TypeError):
         # If it's not a valid ObjectId, fall back to decoding the token
         token = await decode_jwt_token_without_expiration(accessToken)
@@ -177,7 +198,9 @@ async def get_refresh_tokens(refreshToken:str)->refreshTokenOut:
 async def delete_all_tokens_with_user_id(userId:str):
     await db.refreshToken.delete_many(filter={"userId":userId})
     await db.accessToken.delete_many(filter={"userId":userId})
+    await publish_invalidation("user", userId)
     
 async def delete_all_tokens_with_admin_id(adminId:str):
     await db.refreshToken.delete_many(filter={"userId":adminId})
-    await db.accessToken.delete_many(filter={"userId":adminId})
\ No newline at end of file
+    await db.accessToken.delete_many(filter={"userId":adminId})
+    await publish_invalidation("user", adminId)
\ No newline at end of file
@@ -11,6 +11,15 @@ from schemas.imports import *
 # BLOG SCHEMA (updated to parse & validate BlockNote JSON)
 # ====================================================================
 
+def _excerpt_source(current_page_body: Optional[List[Dict[str, Any]]], pages: Optional[List[Page]]) -> List[Dict[str, Any]]:
+    """Blocks the excerpt is generated from: the single-page body, or the first page of a multi-page article."""
+    if current_page_body is not None:
+        return current_page_body
+    if pages:
+        return min(pages, key=lambda page: page.pageNumber).pageBody
+    return []
+
+
 class BlogBase(BaseModel):
     """Base schema for a Blog article, covering main content fields."""
     title: str = Field(..., description="The main title of the article.")
@@ -104,8 +113,9 @@ class BlogCreate(BlogBase):
             self.slug = "invalid-slug"
 
         # 2. Generate Excerpt if missing and parsed exists
+        # Stored at write time so list queries never need to load the body
         if not self.excerpt or self.excerpt=="Article content is currently empty.":
-            self.excerpt = self._generate_excerpt(self.currentPageBody)
+            self.excerpt = self._generate_excerpt(_excerpt_source(self.currentPageBody, self.pages))
         elif not self.excerpt:
             self.excerpt = "Article content is currently empty."
 
@@ -175,8 +185,8 @@ class BlogUpdate(BaseModel):
         # If currentPageBody present, parse it now
         
 
-        if not self.excerpt :
-            self.excerpt = self._generate_excerpt(self.currentPageBody)
+        if not self.excerpt and (self.currentPageBody is not None or self.pages):
+            self.excerpt = self._generate_excerpt(_excerpt_source(self.currentPageBody, self.pages))
 
         if self.state == BlogStatus.published and not self.publishDate:
             self.publishDate = int(time.time())
@@ -546,10 +556,26 @@ class BlogOutUserVersion(BlogBase):
 class ListOfBlogs(BaseModel):
     totalItems:int
     blogs: List[BlogOutLessDetailUserVersion]
+    nextCursor:Optional[str]=None
+    totalCount:Optional[int]=None
     
     
+class Suggestion(BaseModel):
+    type: Literal["category", "author", "title"]
+    text: str
+    id: Optional[str] = None
+    slug: Optional[str] = None
+
+
+class ListOfSuggestions(BaseModel):
+    totalItems:int
+    suggestions: List[Suggestion]
+
+
 class ListOfBlogsWithSameCategories(BaseModel):
     totalItems:int
     category:Optional[CategoryNameEnum]=None
     blogs: List[BlogOutLessDetailUserVersion]
+    nextCursor:Optional[str]=None
+    totalCount:Optional[int]=None
     
\ No newline at end of file
@@ -185,6 +185,16 @@ class ListOfCategories(BaseModel):
     listOfCategories:List[Category]
     totalItems:int
 
+
+class LookupOption(BaseModel):
+    value: str
+    label: str
+
+
+class ListOfLookupOptions(BaseModel):
+    options: List[LookupOption]
+    totalItems: int
+
     
 class BlogStatus(str,Enum):
     published= "published"
@@ -518,8 +528,9 @@ class Page(BaseModel):
     
     
 class SearchQuery(BaseModel):
-    title: Optional[str] = Field(None, description="Search blog titles")
-    author: Optional[str] = Field(None, description="Search blog authors")
+    q: Optional[str] = Field(None, description="Search titles, authors, excerpts and article text")
+    title: Optional[str] = Field(None, description="Only blogs whose title contains this")
+    author: Optional[str] = Field(None, description="Only blogs whose author name contains this")
     start:Optional[int]=0
     stop:Optional[int]=100
   
\ No newline at end of file
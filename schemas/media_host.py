@@ -27,6 +27,8 @@ class MediaBase(BaseModel):
     
 class MediaUpdate(BaseModel):
     category: CategoryNameEnum
+    # Bumped with every edit, so the media ETag / Last-Modified change too
+    last_updated: int = Field(default_factory=lambda: int(time.time()))
     
 class MediaCreate(MediaBase):
     url:str
@@ -1,17 +1,27 @@
 # auth.py
-from fastapi import Depends, HTTPException, status
+import hmac
+import os
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer
 
 from security.tokens import validate_admin_accesstoken,validate_admin_accesstoken_otp,generate_refresh_tokens,generate_member_access_tokens, validate_member_accesstoken, validate_refreshToken,validate_member_accesstoken_without_expiration,generate_admin_access_tokens,validate_expired_admin_accesstoken
 from security.encrypting_jwt import decode_jwt_token,decode_jwt_token_without_expiration
 from repositories.tokens_repo import get_access_tokens,get_access_tokens_no_date_check
 from schemas.tokens_schema import refreshedToken,accessTokenOut
+from security.auth_context import get_auth_context
 
 
+load_dotenv()
+
+# Static bearer token for Prometheus scrapes of /metrics; admins can always scrape
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
 token_auth_scheme = HTTPBearer()
 
-async def verify_token(token: str = Depends(token_auth_scheme))->accessTokenOut:
-    result = await get_access_tokens(accessToken=token.credentials)
+async def verify_token(request: Request, token: str = Depends(token_auth_scheme))->accessTokenOut:
+    auth_context = get_auth_context(request, token.credentials)
+    result = await auth_context.access_token(token.credentials)
     
     if result==None:
         raise HTTPException(
@@ -38,17 +48,12 @@ async def verify_token_to_refresh(token: str = Depends(token_auth_scheme)):
         
         
       
-async def verify_admin_token(token: str = Depends(token_auth_scheme)):
-    from repositories.tokens_repo import get_admin_access_tokens
+async def verify_admin_token(request: Request, token: str = Depends(token_auth_scheme)):
+    auth_context = get_auth_context(request, token.credentials)
     
     try:
-        decoded_access_token = await decode_jwt_token(token=token.credentials)
-        print("")
-        print("")
-        print(decoded_access_token['accessToken'])
-        print("")
-        print("")
-        result = await get_admin_access_tokens(accessToken=decoded_access_token['accessToken'])
+        decoded_access_token = await auth_context.claims()
+        result = await auth_context.admin_access_token(decoded_access_token['accessToken'])
 
         if result==None:
             raise HTTPException(
@@ -61,8 +66,6 @@ async def verify_admin_token(token: str = Depends(token_auth_scheme)):
                 detail="Admin Token hasn't been activated"
             )
         elif isinstance(result, accessTokenOut):
-            
-            decoded_access_token = await decode_jwt_token(token=token.credentials)
             return decoded_access_token
     except TypeError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Access Token Expired")
@@ -91,13 +94,13 @@ async def verify_admin_token_otp(token: str = Depends(token_auth_scheme)):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Access Token Expired")
 
 
-async def verify_any_token(token:str=Depends(token_auth_scheme)):
-    token_type = await decode_jwt_token(token=token.credentials)
+async def verify_any_token(request: Request, token:str=Depends(token_auth_scheme)):
+    token_type = await get_auth_context(request, token.credentials).claims()
     if isinstance(token_type,dict):
         if token_type['role']=='admin':
-            return await verify_admin_token(token=token)
+            return await verify_admin_token(request=request, token=token)
         elif token_type["role"]=='member':
-            return await verify_token(token=token)
+            return await verify_token(request=request, token=token)
         else:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -107,4 +110,10 @@ async def verify_any_token(token:str=Depends(token_auth_scheme)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid Token"
-        )
\ No newline at end of file
+        )
+
+
+async def verify_metrics_access(request: Request, token: str = Depends(token_auth_scheme)):
+    if METRICS_TOKEN and hmac.compare_digest(token.credentials.encode(), METRICS_TOKEN.encode()):
+        return None
+    return await verify_admin_token(request=request, token=token)
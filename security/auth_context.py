@@ -0,0 +1,97 @@
+import time
+from typing import Optional
+from bson import ObjectId
+from fastapi import Request
+from pydantic import ValidationError
+from repositories.tokens_repo import get_access_tokens, get_admin_access_tokens, get_access_tokens_no_date_check
+from schemas.tokens_schema import accessTokenOut
+from security.encrypting_jwt import decode_jwt_token_without_expiration
+
+_UNSET = object()
+
+
+class AuthContext:
+    """
+    Everything derived from a request's bearer token, resolved at most once.
+
+    The rate limiter and the auth dependencies all read from the same
+    instance (stored on `request.state.auth`), so a single request decodes
+    the JWT once and runs each token / admin lookup once.
+    """
+
+    def __init__(self, token: Optional[str]):
+        self.token = token
+        self._claims = _UNSET
+        self._lookups: dict = {}
+
+    async def _memo(self, key: tuple, factory):
+        if key not in self._lookups:
+            self._lookups[key] = await factory()
+        return self._lookups[key]
+
+    async def claims_without_expiration(self) -> Optional[dict]:
+        """Signature-checked JWT payload, ignoring `exp`. None if the token is not a valid JWT."""
+        if self._claims is _UNSET:
+            self._claims = await decode_jwt_token_without_expiration(self.token) if self.token else None
+        return self._claims
+
+    async def claims(self) -> Optional[dict]:
+        """Same contract as `decode_jwt_token`: None if the token is invalid or expired."""
+        claims = await self.claims_without_expiration()
+        if claims is None:
+            return None
+        exp = claims.get("exp")
+        if exp is not None and exp <= time.time():
+            return None
+        return claims
+
+    async def access_token(self, token_id: str):
+        """Memoized `get_access_tokens` (member + active admin tokens, date checked)."""
+        return await self._memo(("access", token_id), lambda: get_access_tokens(accessToken=token_id))
+
+    async def admin_access_token(self, token_id: str):
+        """Memoized `get_admin_access_tokens` (token lookup + admin document check)."""
+        return await self._memo(("admin", token_id), lambda: get_admin_access_tokens(accessToken=token_id))
+
+    async def access_token_no_date_check(self) -> Optional[accessTokenOut]:
+        """
+        Memoized `get_access_tokens_no_date_check` for the raw bearer token.
+        JWTs are resolved from the already decoded claims instead of decoding again.
+        """
+        if not self.token:
+            return None
+        if ObjectId.is_valid(self.token):
+            return await self._memo(("no_date_check", self.token), lambda: get_access_tokens_no_date_check(accessToken=self.token))
+
+        claims = await self.claims_without_expiration()
+        # Member JWTs carry no userId; those resolve like any unknown token
+        if not claims or claims.get("role") not in ("member", "admin") or not claims.get("userId"):
+            return None
+        try:
+            return accessTokenOut(**claims)
+        except ValidationError:
+            return None
+
+
+def _bearer_token(request: Request) -> Optional[str]:
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.split(" ")[1]
+
+
+def get_auth_context(request: Request, token: Optional[str] = None) -> AuthContext:
+    """
+    Returns the request's AuthContext, creating it on first use.
+
+    Args:
+        request: The incoming request.
+        token: Bearer credentials if already extracted (e.g. by HTTPBearer).
+    """
+    if token is None:
+        token = _bearer_token(request)
+    context = getattr(request.state, "auth", None)
+    if context is None or context.token != token:
+        context = AuthContext(token)
+        request.state.auth = context
+    return context
@@ -1,31 +1,24 @@
 import jwt
 import datetime
 from datetime import timezone
-from core.database import db
 from dotenv import load_dotenv
 import os
 import asyncio
-from bson import ObjectId
+from security.key_ring import key_ring
 
 load_dotenv()
 SECRETID = os.getenv("SECRETID")
 SECRET_KEY = "your-secret-key"
 
 async def get_secret_dict()->dict:
-    result =await db.secret_keys.find_one({"_id":ObjectId(SECRETID)})
-    result.pop('_id')
-    return result
+    # Served from the in-memory key ring; only hits Mongo when the ring refreshes
+    return dict(await key_ring.get_keys())
 
 
 
 async def get_secret_and_header():
     
-    import random
-    
-    secrets = await get_secret_dict()
-    
-    random_key = random.choice(list(secrets.keys()))
-    random_secret = secrets[random_key]
+    random_key, random_secret = await key_ring.random_key()
     SECRET_KEYS={random_key:random_secret}
     HEADERS = {"kid":random_key}
     result = {
@@ -66,6 +59,22 @@ async def create_jwt_admin_token(token: str,userId:str):
 
 
 
+async def get_verification_key(token: str) -> str:
+    """
+    Picks the secret a token must be verified with: the key ring entry named
+    by its `kid` header (member tokens), otherwise SECRET_KEY (admin tokens).
+    """
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+    except jwt.DecodeError:
+        # Let jwt.decode report the malformed token
+        return SECRET_KEY
+    if kid is None:
+        return SECRET_KEY
+    key = await key_ring.get_key(kid)
+    return key if key is not None else SECRET_KEY
+
+
 async def decode_jwt_token(token: str):
     """
     Decodes and verifies a JWT token.
@@ -82,7 +91,7 @@ async def decode_jwt_token(token: str):
 
     try:
         # Decode and verify
-        decoded = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        decoded = jwt.decode(token, await get_verification_key(token), algorithms=["HS256"])
         return decoded
 
     except jwt.ExpiredSignatureError:
@@ -103,8 +112,9 @@ async def decode_jwt_token(token: str):
 
 async def decode_jwt_token_without_expiration(token: str):
     try:
+        verification_key = await get_verification_key(token)
         # Try decoding normally (with expiration check)
-        decoded = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        decoded = jwt.decode(token, verification_key, algorithms=["HS256"])
 
         return decoded
     
@@ -113,7 +123,7 @@ async def decode_jwt_token_without_expiration(token: str):
         try:
             # Decode again but skip exp validation
             decoded = jwt.decode(
-                token, SECRET_KEY, algorithms=["HS256"], options={"verify_exp": False}
+                token, verification_key, algorithms=["HS256"], options={"verify_exp": False}
             )
             return decoded
         except Exception as inner_e:
@@ -1,16 +1,72 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv()
+# bcrypt cost factor; every +1 doubles the time spent per hash/check
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# bcrypt releases the GIL, so a few threads give real parallelism without
+# letting a login storm starve the rest of the process
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", 4))
+
+_bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+_stats_lock = threading.Lock()
+_stats = {"queued": 0, "running": 0, "completed": 0, "max_queue_depth": 0}
+
 
 def hash_password(password: str|bytes) -> bytes:
     if type(password)==str:
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed
 
 
- 
+
 
 def check_password(password: str, hashed: bytes | str) -> bool:
     # if hashed is string, convert to bytes
     if isinstance(hashed, str):
         hashed = hashed.encode('utf-8')
     return bcrypt.checkpw(password.encode('utf-8'), hashed)
+
+
+def _run_tracked(func, *args):
+    with _stats_lock:
+        _stats["queued"] -= 1
+        _stats["running"] += 1
+    try:
+        return func(*args)
+    finally:
+        with _stats_lock:
+            _stats["running"] -= 1
+            _stats["completed"] += 1
+
+
+async def _run_in_bcrypt_pool(func, *args):
+    with _stats_lock:
+        _stats["queued"] += 1
+        _stats["max_queue_depth"] = max(_stats["max_queue_depth"], _stats["queued"])
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_executor, _run_tracked, func, *args)
+
+
+async def hash_password_async(password: str|bytes) -> bytes:
+    """`hash_password` run on the bcrypt worker pool instead of the event loop."""
+    return await _run_in_bcrypt_pool(hash_password, password)
+
+
+async def check_password_async(password: str, hashed: bytes | str) -> bool:
+    """`check_password` run on the bcrypt worker pool instead of the event loop."""
+    return await _run_in_bcrypt_pool(check_password, password, hashed)
+
+
+def get_bcrypt_pool_stats() -> dict:
+    """
+    Snapshot of the bcrypt pool: calls waiting for a thread (`queued`),
+    calls hashing right now (`running`), totals and the worst queue seen.
+    """
+    with _stats_lock:
+        return {"max_workers": BCRYPT_MAX_WORKERS, "rounds": BCRYPT_ROUNDS, **_stats}
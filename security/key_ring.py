@@ -0,0 +1,72 @@
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+from bson import ObjectId
+from dotenv import load_dotenv
+from core.database import db
+
+load_dotenv()
+SECRETID = os.getenv("SECRETID")
+# How long the loaded secret set is trusted before it is re-read from Mongo
+JWT_KEY_REFRESH_SECONDS = int(os.getenv("JWT_KEY_REFRESH_SECONDS", 300))
+# Minimum gap between forced reloads triggered by an unknown `kid`
+JWT_KEY_MISS_REFRESH_SECONDS = int(os.getenv("JWT_KEY_MISS_REFRESH_SECONDS", 30))
+
+
+class KeyRing:
+    """
+    In-memory copy of the `secret_keys` document ({kid: secret}).
+
+    Loaded lazily on first use and refreshed every JWT_KEY_REFRESH_SECONDS,
+    so minting and verifying member tokens does not read Mongo per token.
+    A token carrying a `kid` we have not seen yet triggers an early reload
+    (rate limited) so freshly rotated keys are picked up.
+    """
+
+    def __init__(self, refresh_interval: int = JWT_KEY_REFRESH_SECONDS, miss_refresh_interval: int = JWT_KEY_MISS_REFRESH_SECONDS):
+        self.refresh_interval = refresh_interval
+        self.miss_refresh_interval = miss_refresh_interval
+        self._keys: dict[str, str] = {}
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _load(self):
+        result = await db.secret_keys.find_one({"_id": ObjectId(SECRETID)})
+        result.pop("_id")
+        self._keys = result
+        self._loaded_at = time.monotonic()
+
+    async def _refresh(self, max_age: float):
+        async with self._lock:
+            # Another coroutine may have reloaded while we waited for the lock
+            if self._keys and time.monotonic() - self._loaded_at < max_age:
+                return
+            try:
+                await self._load()
+            except Exception as e:
+                if not self._keys:
+                    raise
+                print(f"Failed to refresh JWT key ring, keeping previous keys: {e}")
+                self._loaded_at = time.monotonic()
+
+    async def get_keys(self) -> dict[str, str]:
+        if not self._keys or time.monotonic() - self._loaded_at >= self.refresh_interval:
+            await self._refresh(self.refresh_interval)
+        return self._keys
+
+    async def get_key(self, kid: str) -> Optional[str]:
+        keys = await self.get_keys()
+        if kid not in keys and time.monotonic() - self._loaded_at >= self.miss_refresh_interval:
+            await self._refresh(self.miss_refresh_interval)
+            keys = self._keys
+        return keys.get(kid)
+
+    async def random_key(self) -> tuple[str, str]:
+        keys = await self.get_keys()
+        kid = random.choice(list(keys.keys()))
+        return kid, keys[kid]
+
+
+key_ring = KeyRing()
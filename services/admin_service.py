@@ -11,7 +11,7 @@ from repositories.admin_repo import (
     delete_admin,
 )
 from schemas.admin_schema import AdminCreate, AdminUpdate, AdminOut,AdminBase,AdminRefresh
-from security.hash import check_password
+from security.hash import check_password_async
 from repositories.tokens_repo import add_refresh_tokens, add_admin_access_tokens, accessTokenCreate,accessTokenOut,refreshTokenCreate
 from repositories.tokens_repo import get_refresh_tokens,get_access_tokens,delete_access_token,delete_refresh_token,delete_all_tokens_with_admin_id
 from security.encrypting_jwt import create_jwt_admin_token
@@ -37,7 +37,7 @@ async def authenticate_admin(admin_data:AdminBase )->AdminOut:
     admin = await get_admin(filter_dict={"email":admin_data.email})
 
     if admin != None:
-        if check_password(password=admin_data.password,hashed=admin.password ):
+        if await check_password_async(password=admin_data.password,hashed=admin.password ):
             admin.password=""
             access_token = await add_admin_access_tokens(token_data=accessTokenCreate(userId=admin.id))
             refresh_token  = await add_refresh_tokens(token_data=refreshTokenCreate(userId=admin.id,previousAccessToken=access_token.accesstoken))
@@ -8,25 +8,49 @@
 
 from bson import ObjectId
 from fastapi import HTTPException
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from repositories.blog import (
+    count_blogs,
     create_blog,
     get_blog,
     get_blogs,
+    get_blogs_page,
     update_blog,
     delete_blog,
 )
+from core.response_cache import response_cache
 from schemas.blog import BlogCreate, BlogUpdate, BlogOut
 
 
+def _blog_cache_tags(blog: Optional[BlogOut]) -> List[str]:
+    """Response cache tags of every public route that can include `blog`."""
+    if blog is None:
+        return []
+    return [
+        f"blog:{blog.id}",
+        f"category:{blog.category.slug.value}",
+        f"blogType:{getattr(blog.blogType, 'value', blog.blogType)}",
+        f"author:{blog.author.name}",
+    ]
+
+
+async def _invalidate_blog_responses(*blogs: Optional[BlogOut]):
+    tags = ["blogs:all"]
+    for blog in blogs:
+        tags += _blog_cache_tags(blog)
+    await response_cache.invalidate(*tags)
+
+
 async def add_blog(blog_data: BlogCreate) -> BlogOut:
     """adds an entry of BlogCreate to the database and returns an object
 
     Returns:
         _type_: BlogOut
     """
-    return await create_blog(blog_data)
+    blog = await create_blog(blog_data)
+    await _invalidate_blog_responses(blog)
+    return blog
 
 
 async def remove_blog(blog_id: str):
@@ -40,11 +64,13 @@ async def remove_blog(blog_id: str):
         raise HTTPException(status_code=400, detail="Invalid blog ID format")
 
     filter_dict = {"_id": ObjectId(blog_id)}
+    existing = await get_blog(filter_dict)
     result = await delete_blog(filter_dict)
 
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Blog not found")
-    else: return True
+    await _invalidate_blog_responses(existing)
+    return True
 
 
 async def retrieve_blog_by_blog_id(id: str) -> BlogOut:
@@ -73,7 +99,8 @@ async def retrieve_blogs(
     start: int = 0,
     stop: int = 100,
     sort_field: Optional[str] = None,
-    sort_order: Optional[int] = None  # 1 for ascending, -1 for descending
+    sort_order: Optional[int] = None,  # 1 for ascending, -1 for descending
+    include_total: bool = False
 ) -> List[BlogOut]:
     """
     Retrieves BlogOut objects from the database with optional filtering,
@@ -85,6 +112,7 @@ async def retrieve_blogs(
         stop (int): Stop index for pagination.
         sort_field (str, optional): Field to sort by.
         sort_order (int, optional): 1 for ascending, -1 for descending.
+        include_total (bool): Attach the (cached) total count to each blog.
 
     Returns:
         List[BlogOut]: List of blog objects.
@@ -97,7 +125,8 @@ async def retrieve_blogs(
             start=start,
             stop=stop,
             sort_field=sort_field,
-            sort_order=sort_order
+            sort_order=sort_order,
+            include_total=include_total
         )
 
     # Case 2: Filters only
@@ -105,7 +134,8 @@ async def retrieve_blogs(
         return await get_blogs(
             filter_dict=filters,
             start=start,
-            stop=stop
+            stop=stop,
+            include_total=include_total
         )
 
     # Case 3: Sort only
@@ -114,12 +144,45 @@ async def retrieve_blogs(
             start=start,
             stop=stop,
             sort_field=sort_field,
-            sort_order=sort_order
+            sort_order=sort_order,
+            include_total=include_total
         )
 
     # Case 4: No filters or sort
     else:
-        return await get_blogs(start=start, stop=stop)
+        return await get_blogs(start=start, stop=stop, include_total=include_total)
+
+
+async def retrieve_blogs_page(
+    filters: Optional[dict] = None,
+    start: int = 0,
+    stop: int = 100,
+    sort_field: Optional[str] = None,
+    sort_order: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Tuple[List[BlogOut], Optional[str]]:
+    """
+    Retrieves one page of blogs plus the cursor for the next page.
+
+    Pass the returned cursor back (with the same filters and sort) to keep
+    paging without skipping over earlier results.
+
+    Returns:
+        Tuple[List[BlogOut], Optional[str]]: blogs and next cursor (None on the last page).
+    """
+    return await get_blogs_page(
+        filter_dict=filters,
+        start=start,
+        stop=stop,
+        sort_field=sort_field or "date_created",
+        sort_order=sort_order or -1,
+        cursor=cursor
+    )
+
+
+async def retrieve_blog_count(filters: Optional[dict] = None) -> int:
+    """Total number of blogs matching `filters` (cached briefly)."""
+    return await count_blogs(filters)
 
 
 async def update_blog_by_id(blog_id: str, blog_data: BlogUpdate) -> BlogOut:
@@ -136,9 +199,12 @@ async def update_blog_by_id(blog_id: str, blog_data: BlogUpdate) -> BlogOut:
         raise HTTPException(status_code=400, detail="Invalid blog ID format")
 
     filter_dict = {"_id": ObjectId(blog_id)}
+    existing = await get_blog(filter_dict)
     result = await update_blog(filter_dict, blog_data)
 
     if not result:
         raise HTTPException(status_code=404, detail="Blog not found or update failed")
+    # Old and new category/type/author lists both change
+    await _invalidate_blog_responses(existing, result)
 
     return result
\ No newline at end of file
@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Number of SMTP connections kept open (and of concurrent sender workers)
+EMAIL_POOL_SIZE = int(os.getenv("EMAIL_POOL_SIZE", 2))
+# Max messages sent back-to-back over one connection per worker iteration
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", 20))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", 3))
+EMAIL_RETRY_BASE_DELAY = float(os.getenv("EMAIL_RETRY_BASE_DELAY", 2.0))
+# Idle connections older than this are re-established instead of reused
+EMAIL_CONNECTION_MAX_AGE = int(os.getenv("EMAIL_CONNECTION_MAX_AGE", 300))
+# "inprocess" queues on this event loop, "celery" hands messages to the worker
+EMAIL_DELIVERY_MODE = os.getenv("EMAIL_DELIVERY_MODE", "inprocess").lower()
+
+
+@dataclass
+class OutgoingEmail:
+    sender_email: str
+    receiver_email: str
+    message: str
+    attempts: int = 0
+
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of logged-in SMTP connections.
+
+    Connections are reused across messages and checked with NOOP before
+    reuse, so STARTTLS and login are paid once per connection rather than
+    once per email.
+    """
+
+    def __init__(self, host: str, port: int, login: str, password: str, size: int = EMAIL_POOL_SIZE, max_age: int = EMAIL_CONNECTION_MAX_AGE):
+        self.host = host
+        self.port = port
+        self.login = login
+        self.password = password
+        self.max_age = max_age
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.port == 465:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=30)
+            logger.info(f"Connecting to SMTP server {self.host}:{self.port} using SSL.")
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=30)
+            server.ehlo()
+            # 587 always upgrades; other ports (e.g. a local relay) only if offered
+            if self.port == 587 or server.has_extn("starttls"):
+                server.starttls()
+                server.ehlo()
+                logger.info(f"Connecting to SMTP server {self.host}:{self.port} using STARTTLS.")
+        if self.port in (465, 587) or server.has_extn("auth"):
+            server.login(self.login, self.password)
+            logger.info(f"SMTP login successful for user {self.login}.")
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _is_alive(self, server: smtplib.SMTP, created_at: float) -> bool:
+        if time.monotonic() - created_at > self.max_age:
+            return False
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def acquire(self) -> tuple[smtplib.SMTP, float]:
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    return self._connect(), time.monotonic()
+                if self._is_alive(*entry):
+                    return entry
+                self._close(entry[0])
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, entry: tuple[smtplib.SMTP, float]):
+        with self._lock:
+            self._idle.append(entry)
+        self._slots.release()
+
+    def discard(self, entry: tuple[smtplib.SMTP, float]):
+        self._close(entry[0])
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        entry = self.acquire()
+        try:
+            yield entry[0]
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPAuthenticationError):
+            self.discard(entry)
+            raise
+        except smtplib.SMTPException:
+            self.release(entry)
+            raise
+        except OSError:
+            self.discard(entry)
+            raise
+        else:
+            self.release(entry)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+
+class EmailDeliveryQueue:
+    """
+    Async email queue drained by a few sender workers.
+
+    Each worker takes up to `batch_size` queued messages, sends them over
+    one pooled connection in a thread, and re-queues failures with
+    exponential backoff and jitter until `max_retries` is reached.
+    """
+
+    def __init__(self, pool: SMTPConnectionPool, workers: int = EMAIL_POOL_SIZE, batch_size: int = EMAIL_BATCH_SIZE, max_retries: int = EMAIL_MAX_RETRIES, base_delay: float = EMAIL_RETRY_BASE_DELAY):
+        self.pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        # Failed messages waiting out their backoff, with the timer that re-queues them
+        self._retries: dict[int, tuple[asyncio.TimerHandle, OutgoingEmail]] = {}
+        self._stopping = False
+        self.stats = {"sent": 0, "retried": 0, "failed": 0}
+        # Sender threads and the event loop both update the counters
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _backoff(self, attempts: int) -> float:
+        return self.base_delay * (2 ** (attempts - 1)) * (0.5 + random.random())
+
+    @staticmethod
+    def _is_permanent(error: Exception) -> bool:
+        # 5xx replies and refused recipients will not succeed on retry
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return True
+        return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+    def _send_batch(self, batch: list[OutgoingEmail]) -> list[tuple[OutgoingEmail, Exception]]:
+        """Runs in a worker thread. Returns the messages that were not sent."""
+        failed = []
+        attempted = 0
+        try:
+            with self.pool.connection() as server:
+                for email in batch:
+                    try:
+                        server.sendmail(email.sender_email, email.receiver_email, email.message)
+                    except smtplib.SMTPServerDisconnected:
+                        raise
+                    except smtplib.SMTPException as e:
+                        failed.append((email, e))
+                    else:
+                        self._count("sent")
+                        logger.info(f"Email sent to {email.receiver_email}.")
+                    attempted += 1
+        except Exception as e:
+            # Connection-level failure: everything not yet attempted is retried
+            failed.extend((email, e) for email in batch[attempted:])
+        return failed
+
+    def _retry_later(self, email: OutgoingEmail, error: Exception):
+        email.attempts += 1
+        if email.attempts > self.max_retries or self._is_permanent(error):
+            self._count("failed")
+            logger.error(f"Giving up on email to {email.receiver_email} after {email.attempts} attempt(s): {error}")
+            return
+        if self._stopping:
+            # The last try `stop()` gave it failed too
+            self._count("failed")
+            logger.error(f"Dropping email to {email.receiver_email} on shutdown after {email.attempts} attempt(s): {error}")
+            return
+        self._count("retried")
+        delay = self._backoff(email.attempts)
+        logger.warning(f"Email to {email.receiver_email} failed ({error}), retrying in {delay:.1f}s")
+        handle = asyncio.get_running_loop().call_later(delay, self._requeue, email)
+        self._retries[id(email)] = (handle, email)
+
+    def _requeue(self, email: OutgoingEmail):
+        self._retries.pop(id(email), None)
+        self._queue.put_nowait(email)
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                failed = await asyncio.to_thread(self._send_batch, batch)
+                for email, error in failed:
+                    self._retry_later(email, error)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def enqueue(self, email: OutgoingEmail):
+        """Queues a message and returns immediately; workers start on first use."""
+        self.start()
+        await self._queue.put(email)
+
+    async def deliver(self, email: OutgoingEmail):
+        """Sends one message now (retrying with backoff), used by the Celery task."""
+        while True:
+            failed = await asyncio.to_thread(self._send_batch, [email])
+            if not failed:
+                return
+            error = failed[0][1]
+            email.attempts += 1
+            if email.attempts > self.max_retries or self._is_permanent(error):
+                self._count("failed")
+                raise error
+            self._count("retried")
+            await asyncio.sleep(self._backoff(email.attempts))
+
+    async def stop(self, timeout: float = 10):
+        """
+        Waits (up to `timeout`) for queued mail, then stops workers and closes
+        connections. Messages waiting to be retried get one last try right
+        away instead of after their backoff.
+        """
+        if self._tasks:
+            self._stopping = True
+            for handle, email in self._retries.values():
+                handle.cancel()
+                self._queue.put_nowait(email)
+            self._retries.clear()
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Email queue stopped with {self._queue.qsize()} message(s) unsent")
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+            self._stopping = False
+        await asyncio.to_thread(self.pool.close_all)
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import logging
 import smtplib
@@ -5,10 +6,11 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import formataddr
 from dotenv import load_dotenv
-from email_templates.new_sign_in import generate_new_signin_warning_email_from_template
-from email_templates.otp_template import generate_login_otp_email_from_template
-from email_templates.invitation_template import generate_invitation_email_from_template
-from email_templates.revoking_template import generate_revoke_invitation_email_from_template
+from email_templates.new_sign_in import render_new_signin_warning_email
+from email_templates.otp_template import render_login_otp_email
+from email_templates.invitation_template import render_invitation_email
+from email_templates.revoking_template import render_revoke_invitation_email
+from services.email_delivery import EMAIL_DELIVERY_MODE, EmailDeliveryQueue, OutgoingEmail, SMTPConnectionPool
 
 # Load environment variables
 load_dotenv()
@@ -35,21 +37,22 @@ EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 EMAIL_HOST = os.getenv("EMAIL_HOST")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT"))  # Cast after check
 
+# Shared, pooled delivery queue used by the public send functions below
+email_queue = EmailDeliveryQueue(
+    SMTPConnectionPool(EMAIL_HOST, EMAIL_PORT, EMAIL_USERNAME, EMAIL_PASSWORD)
+)
+
 # ------------------- Email Sending Function -------------------
 
-def send_html_email_optimized(
+def build_html_email(
     sender_email: str,
     sender_display_name: str,
     receiver_email: str,
     subject: str,
     html_content: str,
     plain_text_content: str,
-    smtp_server: str,
-    smtp_port: int,
-    smtp_login: str,
-    smtp_password: str
-):
-    """Sends an HTML email with plain-text fallback and a display name."""
+) -> str:
+    """Builds the multipart (plain-text + HTML) message and returns it serialized."""
 
     formatted_from_address = formataddr((sender_display_name, sender_email))
 
@@ -60,6 +63,55 @@ def send_html_email_optimized(
 
     msg.attach(MIMEText(plain_text_content, "plain"))
     msg.attach(MIMEText(html_content, "html"))
+    return msg.as_string()
+
+
+async def enqueue_html_email(
+    sender_display_name: str,
+    receiver_email: str,
+    subject: str,
+    html_content: str,
+    plain_text_content: str,
+):
+    """
+    Queues an email for delivery and returns without waiting for SMTP.
+    Goes through the in-process pooled queue, or the Celery worker when
+    EMAIL_DELIVERY_MODE=celery.
+    """
+    message = build_html_email(
+        sender_email=EMAIL_USERNAME,
+        sender_display_name=sender_display_name,
+        receiver_email=receiver_email,
+        subject=subject,
+        html_content=html_content,
+        plain_text_content=plain_text_content,
+    )
+    if EMAIL_DELIVERY_MODE == "celery":
+        from celery_worker import celery_app
+        # send_task blocks on the broker connection
+        await asyncio.to_thread(celery_app.send_task, "celery_worker.send_email_task", args=[EMAIL_USERNAME, receiver_email, message])
+    else:
+        await email_queue.enqueue(OutgoingEmail(EMAIL_USERNAME, receiver_email, message))
+
+
+def send_html_email_optimized(
+    sender_email: str,
+    sender_display_name: str,
+    receiver_email: str,
+    subject: str,
+    html_content: str,
+    plain_text_content: str,
+    smtp_server: str,
+    smtp_port: int,
+    smtp_login: str,
+    smtp_password: str
+):
+    """Sends an HTML email with plain-text fallback and a display name.
+
+    Opens a dedicated connection; prefer `enqueue_html_email` on request paths.
+    """
+
+    message = build_html_email(sender_email, sender_display_name, receiver_email, subject, html_content, plain_text_content)
 
     server = None
     try:
@@ -77,7 +129,7 @@ def send_html_email_optimized(
 
         server.login(smtp_login, smtp_password)
         logger.info(f"SMTP login successful for user {smtp_login}.")
-        server.sendmail(sender_email, receiver_email, msg.as_string())
+        server.sendmail(sender_email, receiver_email, message)
         logger.info(f"Email sent to {receiver_email} from {sender_display_name} <{sender_email}>.")
 
     except smtplib.SMTPAuthenticationError as e:
@@ -99,29 +151,19 @@ def send_html_email_optimized(
 
 # ------------------- Public Function -------------------
 
-def send_new_signin_email(receiver_email: str, firstName,lastName,time_data,ip_address,location,extra_data):
+async def send_new_signin_email(receiver_email: str, firstName,lastName,time_data,ip_address,location,extra_data):
     """Sends an automated response regarding a new signin."""
     try:
-        html_body = generate_new_signin_warning_email_from_template(
+        email = render_new_signin_warning_email(
             firstName,lastName,time_data,ip_address,location,extra_data
         )
 
-        plain_text = f"""Hello,
-
-This is an automated message sent to tell {firstName} that there was a new sign in
-"""
-
-        send_html_email_optimized(
-            sender_email=EMAIL_USERNAME,
+        await enqueue_html_email(
             sender_display_name="Aperture Security",
             receiver_email=receiver_email,
             subject="new sign in",
-            html_content=html_body,
-            plain_text_content=plain_text,
-            smtp_server=EMAIL_HOST,
-            smtp_port=EMAIL_PORT,
-            smtp_login=EMAIL_USERNAME,
-            smtp_password=EMAIL_PASSWORD
+            html_content=email.html,
+            plain_text_content=email.text,
         )
 
     except Exception as e:
@@ -130,26 +172,19 @@ This is an automated message sent to tell {firstName} that there was a new sign
 
 
 
-def send_otp(otp: str, user_email:str,):
+async def send_otp(otp: str, user_email:str,):
     """Sends otp"""
     try:
-        html_body = generate_login_otp_email_from_template(
+        email = render_login_otp_email(
             otp_code=otp,user_email=user_email
         )
 
-        plain_text = f"""Hello, {user_email} use {otp} to login  """
-
-        send_html_email_optimized(
-            sender_email=EMAIL_USERNAME,
+        await enqueue_html_email(
             sender_display_name="Aperture Security",
             receiver_email=user_email,
             subject="OTP",
-            html_content=html_body,
-            plain_text_content=plain_text,
-            smtp_server=EMAIL_HOST,
-            smtp_port=EMAIL_PORT,
-            smtp_login=EMAIL_USERNAME,
-            smtp_password=EMAIL_PASSWORD
+            html_content=email.html,
+            plain_text_content=email.text,
         )
 
     except Exception as e:
@@ -159,26 +194,19 @@ def send_otp(otp: str, user_email:str,):
 
 
 
-def send_invite_notification(invitee_email: str, inviter_email:str,):
+async def send_invite_notification(invitee_email: str, inviter_email:str,):
     """Sends invite"""
     try:
-        html_body = generate_invitation_email_from_template(
+        email = render_invitation_email(
             invitee_email=invitee_email,inviter_email=inviter_email,project_name="", register_link=""
         )
 
-        plain_text = f"""Hello, {invitee_email} you have been invited to use Aperture Security EPS Booking Admin Portal """
-
-        send_html_email_optimized(
-            sender_email=EMAIL_USERNAME,
+        await enqueue_html_email(
             sender_display_name="Aperture Security",
             receiver_email=invitee_email,
             subject="Admin App Invitation",
-            html_content=html_body,
-            plain_text_content=plain_text,
-            smtp_server=EMAIL_HOST,
-            smtp_port=EMAIL_PORT,
-            smtp_login=EMAIL_USERNAME,
-            smtp_password=EMAIL_PASSWORD
+            html_content=email.html,
+            plain_text_content=email.text,
         )
 
     except Exception as e:
@@ -186,26 +214,19 @@ def send_invite_notification(invitee_email: str, inviter_email:str,):
         return 1
 
 
-def send_revoke_notification(revoked_user_email: str, revoked_by_email:str,):
+async def send_revoke_notification(revoked_user_email: str, revoked_by_email:str,):
     """Sends revoke notification"""
     try:
-        html_body = generate_revoke_invitation_email_from_template(
+        email = render_revoke_invitation_email(
             revoked_user_email=revoked_user_email,revoked_by_email=revoked_by_email,project_name=""
         )
 
-        plain_text = f"""Hello, {revoked_user_email} your access has been revoked to use Aperture Security EPS Booking Admin Portal """
-
-        send_html_email_optimized(
-            sender_email=EMAIL_USERNAME,
+        await enqueue_html_email(
             sender_display_name="Aperture Security",
             receiver_email=revoked_user_email,
             subject="Admin App Invitation Revoked",
-            html_content=html_body,
-            plain_text_content=plain_text,
-            smtp_server=EMAIL_HOST,
-            smtp_port=EMAIL_PORT,
-            smtp_login=EMAIL_USERNAME,
-            smtp_password=EMAIL_PASSWORD
+            html_content=email.html,
+            plain_text_content=email.text,
         )
 
     except Exception as e:
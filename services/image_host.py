@@ -1,11 +1,125 @@
+import asyncio
 import os
+import random
 import httpx
 from fastapi import UploadFile, HTTPException, status
 import uuid
-from typing import Literal
+from typing import Literal, Optional
 # --- Configuration (assumed to be accessible) ---
 FREEIMAGE_API_KEY = os.environ.get("FREEIMAGE_API_KEY")
-FREEIMAGE_API_URL = "https://freeimage.host/api/1/upload"
+FREEIMAGE_API_URL = os.environ.get("FREEIMAGE_API_URL", "https://freeimage.host/api/1/upload")
+
+IMAGE_HOST_CONNECT_TIMEOUT = float(os.getenv("IMAGE_HOST_CONNECT_TIMEOUT", 5))
+IMAGE_HOST_TIMEOUT = float(os.getenv("IMAGE_HOST_TIMEOUT", 60))
+IMAGE_HOST_MAX_CONNECTIONS = int(os.getenv("IMAGE_HOST_MAX_CONNECTIONS", 10))
+IMAGE_HOST_MAX_CONCURRENCY = int(os.getenv("IMAGE_HOST_MAX_CONCURRENCY", 8))
+IMAGE_HOST_MAX_RETRIES = int(os.getenv("IMAGE_HOST_MAX_RETRIES", 3))
+IMAGE_HOST_RETRY_BASE_DELAY = float(os.getenv("IMAGE_HOST_RETRY_BASE_DELAY", 0.5))
+# Upper bound for one upload, queueing and every retry included
+IMAGE_HOST_TOTAL_TIMEOUT = float(os.getenv("IMAGE_HOST_TOTAL_TIMEOUT", 90))
+# Uploads aren't idempotent, so only answers saying the upload was not
+# processed are retried; a 502/504 may come after the host stored it
+RETRYABLE_STATUS_CODES = {429, 503}
+# Errors raised before the request was sent; anything later (read timeout,
+# dropped connection) may follow a stored upload and is not retried
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+try:
+    import h2  # noqa: F401  (httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class ImageHostClient:
+    """
+    Shared httpx client for the image host.
+
+    Keeps one pooled connection (HTTP/2 when `h2` is installed and the host
+    negotiates it) per event loop, caps concurrent uploads with a semaphore
+    and retries failed connects and 429/503 answers with jittered
+    exponential backoff, within IMAGE_HOST_TOTAL_TIMEOUT. The API opens and closes it in its lifespan; the
+    Celery worker creates it on first use.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = IMAGE_HOST_MAX_CONCURRENCY,
+        max_retries: int = IMAGE_HOST_MAX_RETRIES,
+        base_delay: float = IMAGE_HOST_RETRY_BASE_DELAY,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # httpx connections can't move between loops; a new loop gets its own pool
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(IMAGE_HOST_TIMEOUT, connect=IMAGE_HOST_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=IMAGE_HOST_MAX_CONNECTIONS,
+                    max_keepalive_connections=IMAGE_HOST_MAX_CONNECTIONS,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, base * 2^attempt]
+        return random.uniform(0, self.base_delay * (2 ** attempt))
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        """
+        POSTs through the shared pool. Returns the last response (callers
+        check its status); raises httpx.RequestError when the upload could
+        not be sent or took longer than IMAGE_HOST_TOTAL_TIMEOUT.
+        """
+        try:
+            return await asyncio.wait_for(self._post_with_retries(url, **kwargs), IMAGE_HOST_TOTAL_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.stats["failures"] += 1
+            raise httpx.TimeoutException(f"Image host upload took longer than {IMAGE_HOST_TOTAL_TIMEOUT:g}s")
+
+    async def _post_with_retries(self, url: str, **kwargs) -> httpx.Response:
+        client = self._ensure_client()
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                self.stats["requests"] += 1
+                try:
+                    response = await client.post(url, **kwargs)
+                except RETRYABLE_ERRORS:
+                    if attempt == self.max_retries:
+                        self.stats["failures"] += 1
+                        raise
+                except httpx.RequestError:
+                    self.stats["failures"] += 1
+                    raise
+                else:
+                    if response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                        return response
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt))
+
+    async def start(self):
+        self._ensure_client()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+            self._loop = None
+
+
+image_host_client = ImageHostClient()
 
 
 async def upload_to_freeimage_service_from_bytes(file_bytes: bytes, filename: str, content_type: str) -> str:
@@ -22,18 +136,17 @@ async def upload_to_freeimage_service_from_bytes(file_bytes: bytes, filename: st
         "source": (filename, file_bytes, content_type)
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                FREEIMAGE_API_URL,
-                params=params,
-                files=files_payload
-            )
-            response.raise_for_status()
-        except httpx.RequestError as e:
-            raise HTTPException(503, f"Connection failed: {e}")
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(e.response.status_code, f"Image host returned error: {e.response.text}")
+    try:
+        response = await image_host_client.post(
+            FREEIMAGE_API_URL,
+            params=params,
+            files=files_payload
+        )
+        response.raise_for_status()
+    except httpx.RequestError as e:
+        raise HTTPException(503, f"Connection failed: {e}")
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(e.response.status_code, f"Image host returned error: {e.response.text}")
 
     try:
         data = response.json()
@@ -93,31 +206,30 @@ async def upload_to_freeimage_service(file: UploadFile) -> str:
     finally:
         await file.close()
 
-    # 3. Send the request to the external API
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                FREEIMAGE_API_URL,
-                params=params,
-                files=files_payload
-            )
-            
-            # Raise an exception for HTTP errors (e.g., 404, 500)
-            response.raise_for_status()
-
-        except httpx.RequestError as e:
-            # Network-related errors
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Failed to connect to the image hosting service: {e}"
-            )
+    # 3. Send the request to the external API over the shared pool
+    try:
+        response = await image_host_client.post(
+            FREEIMAGE_API_URL,
+            params=params,
+            files=files_payload
+        )
         
-        except httpx.HTTPStatusError as e:
-            # Errors returned by the external API (4xx, 5xx)
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"Image host returned an error: {e.response.text}"
-            )
+        # Raise an exception for HTTP errors (e.g., 404, 500)
+        response.raise_for_status()
+
+    except httpx.RequestError as e:
+        # Network-related errors
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Failed to connect to the image hosting service: {e}"
+        )
+    
+    except httpx.HTTPStatusError as e:
+        # Errors returned by the external API (4xx, 5xx)
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Image host returned an error: {e.response.text}"
+        )
 
     # 4. Parse the response from the external API
     try:
@@ -0,0 +1,69 @@
+# ============================================================================
+# MEDIA SERVICE
+# ============================================================================
+# Uploads go through here so identical content is only stored once: every
+# upload is hashed (SHA-256) before anything leaves the API, and a hash that
+# is already known returns the URL it was stored under.
+# ============================================================================
+
+from typing import Optional
+from fastapi import UploadFile
+
+from core.database import db
+from repositories.media_host import (
+    create_media,
+    delete_gridfs_file,
+    get_asset_by_hash,
+    get_media,
+    hash_upload,
+    save_asset_hash,
+    save_video_to_mongodb,
+)
+from schemas.media_host import MediaCreate, MediaOut
+from services.image_host import upload_to_freeimage_service
+
+
+async def upload_image_once(file: UploadFile) -> str:
+    """Image URL on the image host; uploads only content it hasn't seen."""
+    content_hash, size = await hash_upload(file)
+    existing = await get_asset_by_hash(content_hash)
+    if existing is not None:
+        await file.close()
+        return existing["url"]
+    image_url = await upload_to_freeimage_service(file)
+    record = await save_asset_hash(content_hash, image_url, "image", size)
+    return record["url"]
+
+
+async def save_video_once(file: UploadFile) -> str:
+    """`/videos/<id>` URL of the video; writes to GridFS only for new content."""
+    content_hash, size = await hash_upload(file)
+    existing = await get_asset_by_hash(content_hash)
+    if existing is not None:
+        return existing["url"]
+    video_url = await save_video_to_mongodb(file)
+    record = await save_asset_hash(content_hash, video_url, "video", size)
+    if record["url"] != video_url:
+        # A concurrent upload of the same clip won; drop our copy
+        await delete_gridfs_file(video_url)
+    return record["url"]
+
+
+async def find_duplicate_media(content_hash: str, category: str, filename: str, request_url: str) -> Optional[MediaOut]:
+    """
+    The media item for already-stored content in `category`, created from the
+    stored asset if this category doesn't have it yet. None for new content.
+    """
+    existing = await get_asset_by_hash(content_hash)
+    if existing is None:
+        return None
+    url = existing["url"]
+    if existing["mediaType"] == "video":
+        url = request_url + url
+    media = await get_media({"url": url, "category": category})
+    if media is not None:
+        return media
+    return await create_media(
+        MediaCreate(mediaType=existing["mediaType"], category=category, url=url, name=filename),
+        database=db,
+    )
@@ -11,7 +11,7 @@ from repositories.user_repo import (
     delete_user,
 )
 from schemas.user_schema import UserCreate, UserUpdate, UserOut,UserBase,UserRefresh
-from security.hash import check_password
+from security.hash import check_password_async
 from security.encrypting_jwt import create_jwt_member_token
 from repositories.tokens_repo import add_refresh_tokens, add_access_tokens, accessTokenCreate,accessTokenOut,refreshTokenCreate
 from repositories.tokens_repo import get_refresh_tokens,get_access_tokens,delete_access_token,delete_refresh_token,delete_all_tokens_with_user_id
@@ -53,7 +53,7 @@ async def authenticate_user(user_data:UserBase )->UserOut:
     user = await get_user(filter_dict={"email":user_data.email})
 
     if user != None:
-        if check_password(password=user_data.password,hashed=user.password ):
+        if await check_password_async(password=user_data.password,hashed=user.password ):
             user.password=""
             access_token = await add_access_tokens(token_data=accessTokenCreate(userId=user.id))
             refresh_token  = await add_refresh_tokens(token_data=refreshTokenCreate(userId=user.id,previousAccessToken=access_token.accesstoken))
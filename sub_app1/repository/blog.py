@@ -1,33 +1,89 @@
-
 # ============================================================
-# Search Blogs (Text + Field Filters)
+# Search Blogs (Ranked Full-Text + Prefix Expansion)
 # ============================================================
 
-from typing import List
+from typing import List, Optional
 
 from fastapi import HTTPException,status
 from core.database import db
+from core.projections import projection_for
+from core.search import MAX_PREFIX_EXPANSIONS, MIN_PREFIX_LENGTH, prefix_pattern
 from schemas.blog import BlogOutLessDetailUserVersion
 
+PUBLISHED_FILTER = {"state": "published"}
+# Upper bound on blogs sampled when expanding a prefix into indexed terms
+PREFIX_SAMPLE_SIZE = 2000
+
+
+def prefix_filter(prefix: str) -> dict:
+    """Published blogs with an indexed term starting with `prefix` (see `expand_prefix`)."""
+    return {**PUBLISHED_FILTER, "search_terms": {"$regex": prefix_pattern(prefix)}}
+
+
+def search_filter(search_words: List[str], field_filters: Optional[dict] = None) -> dict:
+    """The `$text` filter `search_blogs_repo` runs, ANDed with `field_filters`."""
+    return {
+        **PUBLISHED_FILTER,
+        **(field_filters or {}),
+        "$text": {"$search": " ".join(dict.fromkeys(search_words))},
+    }
+
+
+async def expand_prefix(prefix: str, limit: int = MAX_PREFIX_EXPANSIONS) -> List[str]:
+    """
+    Indexed terms of published blogs that start with `prefix`, most common first.
+    Uses the (state, search_terms) index, so only matching blogs are read.
+    """
+    pattern = prefix_pattern(prefix)
+    pipeline = [
+        {"$match": prefix_filter(prefix)},
+        {"$limit": PREFIX_SAMPLE_SIZE},
+        {"$project": {"search_terms": 1}},
+        {"$unwind": "$search_terms"},
+        {"$match": {"search_terms": {"$regex": pattern}}},
+        {"$group": {"_id": "$search_terms", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    return [row["_id"] async for row in db.blogs.aggregate(pipeline)]
+
 
 async def search_blogs_repo(
-    filters: dict,
+    words: List[str],
     skip: int,
-    limit: int
+    limit: int,
+    field_filters: Optional[dict] = None,
 ) -> List[BlogOutLessDetailUserVersion]:
     """
-    Executes a MongoDB find() query for searching blogs.
-    Adds pagination, total count, and index numbering to results.
+    Ranked search over published blogs using the `blog_search` text index
+    (title, author, excerpt and body text, weighted in that order).
+
+    The last word is treated as a prefix and expanded to the indexed terms
+    it starts, so "arse" also finds "arsenal". `field_filters` (e.g. the
+    title / author filters) must all match as well; with no words they are
+    the whole query, newest first. Adds pagination and index numbering to
+    results.
     """
-   
+    if (not words and not field_filters) or limit <= 0:
+        return []
+
     try:
-        # 1️⃣ Get total count BEFORE pagination
-        total_items = await db.blogs.count_documents(filters)
+        filters = {**PUBLISHED_FILTER, **(field_filters or {})}
+        projection = projection_for(BlogOutLessDetailUserVersion)
+        sort = [("_id", -1)]
+        if words:
+            *complete_words, last_word = words
+            search_words = complete_words + [last_word]
+            if len(last_word) >= MIN_PREFIX_LENGTH:
+                search_words += await expand_prefix(last_word)
+            filters = search_filter(search_words, field_filters)
+            projection = {**projection, "score": {"$meta": "textScore"}}
+            sort = [("score", {"$meta": "textScore"}), ("_id", -1)]
 
-        # 2️⃣ Apply pagination with find()
         cursor = (
             db.blogs
-            .find(filters)
+            .find(filters, projection)
+            .sort(sort)
             .skip(skip)
             .limit(limit)
         )
@@ -37,7 +93,7 @@ async def search_blogs_repo(
 
         async for doc in cursor:
             blog_item = BlogOutLessDetailUserVersion(**doc)
-      
+
             blog_item.itemIndex = item_index
             results.append(blog_item)
             item_index += 1
@@ -49,4 +105,3 @@ async def search_blogs_repo(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while searching blogs: {str(e)}"
         )
-
@@ -1,11 +1,12 @@
+import hashlib
 import time
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, Path, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Path, Request, status
 from typing import List, Optional
 import json
-from schemas.imports import ListOfCategories, SearchQuery
+from schemas.imports import ListOfCategories, ListOfLookupOptions, LookupOption, SearchQuery
 from schemas.response_schema import APIResponse
 from sub_app1.services.blog import search_blogs_service    
-from sub_app1.services.utils import get_club_fanart_url_robust, get_path_filter, get_sort
+from sub_app1.services.utils import BLOG_TYPE_MAP, SORT_MAP, get_author_filter, get_category_filter, get_path_filter, get_sort
 from sub_app1.schemas.imports import BlogType, SortType
 from schemas.blog import (
  
@@ -19,12 +20,20 @@ from schemas.blog import (
     Category,
     CATEGORY_PAIRS,
     ListOfBlogs,
-    ListOfBlogsWithSameCategories
+    ListOfBlogsWithSameCategories,
+    ListOfSuggestions,
+    Suggestion
 )
+from core.suggest import get_suggestion_index
+from core.category_artwork import get_category_artwork
+from core.static_payloads import static_payloads
+from core.response_cache import cache_response, cached_json_response
+from core.conditional import make_etag
 from services.blog_service import (
     add_blog,
     remove_blog,
-    retrieve_blogs,
+    retrieve_blogs_page,
+    retrieve_blog_count,
     retrieve_blog_by_blog_id,
     update_blog_by_id,
 )
@@ -35,19 +44,14 @@ router = APIRouter(prefix="/content",)
 PUBLISHED_FILTER = {"state": BlogStatus.published.value}
 
 # -------------------------------------------------------------------
-# List all available categories
-# (This endpoint is not for blogs, so it remains unchanged)
+# Constant lookups
+# (Built once into JSON bytes and served from memory with an ETag;
+#  categories are rebuilt when the artwork refresh finishes)
 # -------------------------------------------------------------------
-@router.get("/categories", response_model=APIResponse[ListOfCategories])
-async def list_all_categories():
-    """
-    Retrieves a list of all available blog categories and their slugs.
-    """
-    total = len(CATEGORY_PAIRS)
-
+def _build_categories_payload() -> APIResponse[ListOfCategories]:
     categories = [
         Category(
-            imageUrl=get_club_fanart_url_robust(name),
+            imageUrl=get_category_artwork(name),
             name=name,
             
             slug=slug,
@@ -56,22 +60,75 @@ async def list_all_categories():
         )
         for i, (name, slug) in enumerate(CATEGORY_PAIRS.items(), start=1)
     ]
-    listOfCategories =ListOfCategories(listOfCategories=categories,totalItems=total)
+    listOfCategories =ListOfCategories(listOfCategories=categories,totalItems=len(categories))
     return APIResponse(
         status_code=200,
         data=listOfCategories,
         detail="Successfully retrieved all categories."
     )
+
+
+def _build_blog_types_payload() -> APIResponse[ListOfLookupOptions]:
+    options = [LookupOption(value=value, label=path_filter["blogType"]) for value, path_filter in BLOG_TYPE_MAP.items()]
+    return APIResponse(
+        status_code=200,
+        data=ListOfLookupOptions(options=options, totalItems=len(options)),
+        detail="Successfully retrieved all blog types."
+    )
+
+
+def _build_sort_options_payload() -> APIResponse[ListOfLookupOptions]:
+    options = [
+        LookupOption(value=value, label="".join(f" {c.lower()}" if c.isupper() else c for c in value).capitalize())
+        for value in SORT_MAP
+    ]
+    return APIResponse(
+        status_code=200,
+        data=ListOfLookupOptions(options=options, totalItems=len(options)),
+        detail="Successfully retrieved all sort options."
+    )
+
+
+static_payloads.register("categories", _build_categories_payload)
+static_payloads.register("blog-types", _build_blog_types_payload)
+static_payloads.register("sort-options", _build_sort_options_payload)
+
+
+@router.get("/categories", response_model=APIResponse[ListOfCategories])
+async def list_all_categories(request: Request):
+    """
+    Retrieves a list of all available blog categories and their slugs.
+    """
+    return static_payloads.response(request, "categories")
+
+
+@router.get("/blog-types", response_model=APIResponse[ListOfLookupOptions])
+async def list_blog_types(request: Request):
+    """
+    Retrieves the blog types accepted by `/by-blog-type/{blog_type}`.
+    """
+    return static_payloads.response(request, "blog-types")
+
+
+@router.get("/sort-options", response_model=APIResponse[ListOfLookupOptions])
+async def list_sort_options(request: Request):
+    """
+    Retrieves the values accepted by the `sort` query parameter.
+    """
+    return static_payloads.response(request, "sort-options")
     
 # -------------------------------------------------------------------
 # Get *Published* Blogs by BlogType
 # -------------------------------------------------------------------
 @router.get("/by-blog-type/{blog_type}", response_model=APIResponse[ListOfBlogs])
+@cache_response("by-blog-type", tags=lambda blog_type, **_: [f"blogType:{get_path_filter(blog_type)['blogType']}"])
 async def list_blogs_by_blog_type(
     blog_type: BlogType = Path(..., description="The type of blog to filter by"),
     start: Optional[int] = Query(0, description="Start index for pagination"),
     stop: Optional[int] = Query(50, description="Stop index for pagination"),
-    sort: Optional[SortType] = Query(SortType.newest,description='Optional Sort string describing MongoDB sort instructions ')
+    sort: Optional[SortType] = Query(SortType.newest,description='Optional Sort string describing MongoDB sort instructions '),
+    cursor: Optional[str] = Query(None, description="Opaque `nextCursor` from the previous page; when set, `start` is ignored and `stop - start` is the page size"),
+    include_total: bool = Query(False, description="Also return `totalCount`, the number of matching blogs")
 ):
     """
     Retrieves *published* blogs filtered by a specific `BlogType`.
@@ -92,16 +149,20 @@ async def list_blogs_by_blog_type(
     sort_info = get_sort(sort.value)
     field = sort_info["sort_field"]
     order = sort_info["sort_order"]
-    items = await retrieve_blogs(
+    items, next_cursor = await retrieve_blogs_page(
         filters=final_filters,
         start=start,
         stop=stop,
         sort_field=field,
-        sort_order=order
+        sort_order=order,
+        cursor=cursor
     )
+    total_count = await retrieve_blog_count(final_filters) if include_total else None
     blogs = ListOfBlogs(
     blogs=[BlogOutLessDetailUserVersion(**item.model_dump()) for item in items],
-    totalItems=len(items)
+    totalItems=len(items),
+    nextCursor=next_cursor,
+    totalCount=total_count
 )
     return APIResponse(
         status_code=200,
@@ -113,17 +174,20 @@ async def list_blogs_by_blog_type(
 # Get *Published* Blogs by Category Slug
 # -------------------------------------------------------------------
 @router.get("/by-category-slug/{slug}",  response_model=APIResponse[ListOfBlogsWithSameCategories])
+@cache_response("by-category-slug", tags=lambda slug, **_: [f"category:{slug.value}"])
 async def list_blogs_by_category_slug(
     slug: CategorySlugEnum = Path(..., description="The category slug to filter by"),
     start: Optional[int] = Query(0, description="Start index for pagination"),
     stop: Optional[int] = Query(50, description="Stop index for pagination"),
-    sort: Optional[SortType] = Query(SortType.newest,description='Optional Sort string describing MongoDB sort instructions ')
+    sort: Optional[SortType] = Query(SortType.newest,description='Optional Sort string describing MongoDB sort instructions '),
+    cursor: Optional[str] = Query(None, description="Opaque `nextCursor` from the previous page; when set, `start` is ignored and `stop - start` is the page size"),
+    include_total: bool = Query(False, description="Also return `totalCount`, the number of matching blogs")
 ):
     """
     Retrieves *published* blogs filtered by a specific `category.slug`.
     Supports additional filtering and pagination.
     """
-    path_filter = {"category.slug": slug.value}
+    path_filter = get_category_filter(slug.value)
     
     parsed_filters = {}
  
@@ -134,16 +198,20 @@ async def list_blogs_by_category_slug(
     sort_info = get_sort(sort.value)
     field = sort_info["sort_field"]
     order = sort_info["sort_order"]
-    items = await retrieve_blogs(
+    items, next_cursor = await retrieve_blogs_page(
         filters=final_filters,
         start=start,
         stop=stop,
         sort_field=field,
-        sort_order=order
+        sort_order=order,
+        cursor=cursor
     )
+    total_count = await retrieve_blog_count(final_filters) if include_total else None
     list_of_blogs = ListOfBlogsWithSameCategories( 
         blogs=[BlogOutLessDetailUserVersion(**item.model_dump()) for item in items],
         totalItems=len(items),
+        nextCursor=next_cursor,
+        totalCount=total_count,
         category=items[0].category.name if items else None )
     return APIResponse(
         status_code=200,
@@ -155,17 +223,20 @@ async def list_blogs_by_category_slug(
 # Get *Published* Blogs by Author Name
 # -------------------------------------------------------------------
 @router.get("/by-author-name",  response_model=APIResponse[ListOfBlogs])
+@cache_response("by-author-name", tags=lambda author_name, **_: [f"author:{author_name}"])
 async def list_blogs_by_author_name(
     author_name: str = Query(..., description="The author name to filter by (exact match)"),
     start: Optional[int] = Query(0, description="Start index for pagination"),
     stop: Optional[int] = Query(50, description="Stop index for pagination"),
-    sort: Optional[SortType] = Query(SortType.newest,description='Optional Sort string describing MongoDB sort instructions ')
+    sort: Optional[SortType] = Query(SortType.newest,description='Optional Sort string describing MongoDB sort instructions '),
+    cursor: Optional[str] = Query(None, description="Opaque `nextCursor` from the previous page; when set, `start` is ignored and `stop - start` is the page size"),
+    include_total: bool = Query(False, description="Also return `totalCount`, the number of matching blogs")
 ):
     """
     Retrieves *published* blogs filtered by a specific `author.name`.
     Supports additional filtering and pagination.
     """
-    path_filter = {"author.name": author_name}
+    path_filter = get_author_filter(author_name)
     
     parsed_filters = {}
    
@@ -177,16 +248,20 @@ async def list_blogs_by_author_name(
     field = sort_info["sort_field"]
     order = sort_info["sort_order"]
     
-    items = await retrieve_blogs(
+    items, next_cursor = await retrieve_blogs_page(
         filters=final_filters,
         start=start,
         stop=stop,
         sort_field=field,
-        sort_order=order
+        sort_order=order,
+        cursor=cursor
     )
+    total_count = await retrieve_blog_count(final_filters) if include_total else None
     blogs = ListOfBlogs(
     blogs=[BlogOutLessDetailUserVersion(**item.model_dump()) for item in items],
-    totalItems=len(items)
+    totalItems=len(items),
+    nextCursor=next_cursor,
+    totalCount=total_count
 )
     return APIResponse(
         status_code=200,
@@ -203,10 +278,13 @@ async def list_blogs_by_author_name(
 # List *Published* Blogs
 # ------------------------------
 @router.get("/", response_model=APIResponse[ListOfBlogs])
+@cache_response("list", tags=lambda **_: ["blogs:all"])
 async def list_blogs(
     start: Optional[int] = Query(0, description="Start index for range-based pagination"),
     stop: Optional[int] = Query(100, description="Stop index for range-based pagination"),
-    sort: Optional[SortType] = Query(SortType.newest,description='Optional Sort string describing MongoDB sort instructions ')
+    sort: Optional[SortType] = Query(SortType.newest,description='Optional Sort string describing MongoDB sort instructions '),
+    cursor: Optional[str] = Query(None, description="Opaque `nextCursor` from the previous page; when set, `start` is ignored and `stop - start` is the page size"),
+    include_total: bool = Query(False, description="Also return `totalCount`, the number of matching blogs")
 ):
     """
     Retrieves a list of *published* Blogs with pagination and optional filtering.
@@ -225,46 +303,76 @@ async def list_blogs(
         if stop < start:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'stop' cannot be less than 'start'.")
         
-        items = await retrieve_blogs(filters=final_filters, start=start, stop=stop,sort_field=field,sort_order=order)
+        items, next_cursor = await retrieve_blogs_page(filters=final_filters, start=start, stop=stop,sort_field=field,sort_order=order,cursor=cursor)
         detail_msg = "Fetched published blogs successfully"
     else:
-        items = await retrieve_blogs(filters=final_filters, start=0, stop=100,sort_field=field,sort_order=order)
+        items, next_cursor = await retrieve_blogs_page(filters=final_filters, start=0, stop=100,sort_field=field,sort_order=order,cursor=cursor)
         detail_msg = "Fetched first 100 published records successfully"
         
     if parsed_filters:
         detail_msg += " (with additional filters applied)"
+    total_count = await retrieve_blog_count(final_filters) if include_total else None
     blogs = ListOfBlogs(
     blogs=[BlogOutLessDetailUserVersion(**item.model_dump()) for item in items],
-    totalItems=len(items)
+    totalItems=len(items),
+    nextCursor=next_cursor,
+    totalCount=total_count
 )
     return APIResponse(status_code=200, data=blogs, detail=detail_msg)
 
 
+# ------------------------------
+# Typeahead suggestions
+# ------------------------------
+@router.get("/suggest", response_model=APIResponse[ListOfSuggestions])
+async def suggest(
+    q: str = Query(..., min_length=1, description="What the user has typed so far"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions")
+):
+    """
+    Returns categories, authors and *published* titles with a word starting
+    with `q`. Served from an in-memory index, without a database round trip.
+    """
+    suggestions = [Suggestion(**entry) for entry in get_suggestion_index().suggest(q, limit)]
+    return APIResponse(
+        status_code=200,
+        data=ListOfSuggestions(suggestions=suggestions, totalItems=len(suggestions)),
+        detail=f"Found {len(suggestions)} suggestions."
+    )
+
+
 # ------------------------------
 # Retrieve a single *Published* Blog
 # ------------------------------
 @router.get("/{id}", response_model=APIResponse[BlogOutUserVersion])
 async def get_blog_by_id(
+    request: Request,
     id: str = Path(..., description="blog ID to fetch specific item")
 ):
     """
     Retrieves a single *published* Blog by its ID.
     Returns 404 if the blog is not found or is not published.
+    Sends ETag / Last-Modified and answers conditional requests with 304;
+    both come from the response cache, so a hit skips MongoDB entirely.
     """
-    item = await retrieve_blog_by_blog_id(id=id)
-    
-    if not item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Blog not found")
-        
-    # Enforce published state
-    # We use 404 to avoid leaking the existence of a draft
-    if item.state != BlogStatus.published:
-         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Blog not found or is not published"
-        )
-            
-    return APIResponse(status_code=200, data=item, detail="blog item fetched")
+    async def build():
+        item = await retrieve_blog_by_blog_id(id=id)
+        # Enforce published state (also covers a blog deleted meanwhile)
+        # We use 404 to avoid leaking the existence of a draft
+        if item is None or item.state != BlogStatus.published:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Blog not found or is not published"
+            )
+        return APIResponse(status_code=200, data=item, detail="blog item fetched")
+
+    def validators(content, body):
+        # Hashes the body: `last_updated` has one second resolution, so two
+        # updates within a second would otherwise share an ETag
+        return make_etag(id, hashlib.sha1(body).hexdigest()), content.data.last_updated
+
+    # Updates and deletes invalidate the `blog:<id>` tag
+    return await cached_json_response("by-id", {"id": id}, [f"blog:{id}"], build, validators, request)
 
 # ------------------------------------------------
 # Searches and returns Multiple *Published* Blogs
@@ -273,22 +381,24 @@ async def get_blog_by_id(
     "/search/",
  
     summary="Search blog articles by keywords",
-    description="Finds and ranks published articles by title or author with pagination."
+    description="Finds and ranks published articles by title, author, excerpt and text with pagination. The last word of `q` also matches as a prefix; `title` and `author` must all match as well."
 )
 async def search_published_blogs(
     query_params: SearchQuery = Depends()
 ):
     """
-    Executes the MongoDB search using regex on title and/or author.
+    Executes a ranked MongoDB text search over the published blogs.
     """
 
     # 1. Validation (Handle the mandatory search term)
-    if ( not query_params.title or not query_params.title.strip() ) and ( not query_params.author or not query_params.author.strip()):
+    if not any(value and value.strip() for value in (query_params.q, query_params.title, query_params.author)):
         # Raise an exception for an invalid query
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Search query 'title' and 'author' parameter cannot be empty."
+            detail="Search query 'q', 'title' and 'author' parameter cannot all be empty."
         )
+    if query_params.stop < query_params.start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'stop' cannot be less than 'start'.")
 
     # 2. Service Call
     search_results = await search_blogs_service(query_params)
@@ -1,7 +1,8 @@
 import json
 from typing import List, Literal, Optional
-from fastapi import APIRouter, HTTPException, Query, Path, status
-from repositories.media_host import get_media,get_media_files, MediaOut
+from fastapi import APIRouter, HTTPException, Query, Path, Request, Response, status
+from core.conditional import is_not_modified, make_etag, not_modified, validator_headers
+from repositories.media_host import get_media,get_media_files,get_media_validators, MediaOut
 from schemas.imports import CATEGORY_PAIRS, CategoryNameEnum, CategorySlugEnum
 from schemas.media_host import ListOfMediaOut, MediaOutUser
 from schemas.response_schema import APIResponse
@@ -193,10 +194,13 @@ async def list_media(
 # -------------------------------------------------------------------
 @router.get("/{id}", response_model=APIResponse[MediaOut])
 async def get_media_by_id(
+    request: Request,
+    response: Response,
     id: str = Path(..., description="Media ID (UUID or ObjectId string)")
 ):
     """
     Retrieves a single Media item by its ID.
+    Sends ETag / Last-Modified and answers conditional requests with 304.
     """
     # Depending on your DB schema, you might need to convert id to ObjectId here,
     # or if you store UUIDs as strings, this is fine.
@@ -214,11 +218,22 @@ async def get_media_by_id(
     except:
          query = {"_id": id}
 
+    # Only last_updated is read before deciding on a 304
+    validators = await get_media_validators(filter_dict=query)
+    if not validators:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Media item not found")
+
+    last_updated = validators.get("last_updated")
+    etag = make_etag(id, last_updated)
+    if is_not_modified(request, etag, last_updated):
+        return not_modified(etag, last_updated)
+
     item = await get_media(filter_dict=query)
     
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Media item not found")
-            
+
+    response.headers.update(validator_headers(etag, last_updated))
     return APIResponse(status_code=200, data=item, detail="Media item fetched")
 
 
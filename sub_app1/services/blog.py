@@ -1,29 +1,30 @@
 
+import re
 from schemas.blog import BlogOutLessDetailUserVersion, ListOfBlogs
 from schemas.imports import SearchQuery
+from core.search import tokenize
 from sub_app1.repository.blog import search_blogs_repo
 
 
 async def search_blogs_service(query_params: SearchQuery):
 
-    # Build a flexible MongoDB find() filter
-    filters = {}
+    # `q` is a ranked search; the text index weighs title and author
+    # matches above excerpt and body matches
+    words = tokenize(query_params.q)
 
-    # Case-insensitive regex filters
+    # `title` and `author` narrow it down: case-insensitive substring
+    # filters that must all match (the input is matched literally)
+    field_filters = {}
     if query_params.title:
-        filters["title"] = {"$regex": query_params.title, "$options": "i"}
-
+        field_filters["title"] = {"$regex": re.escape(query_params.title), "$options": "i"}
     if query_params.author:
-        filters["author.name"] = {"$regex": query_params.author, "$options": "i"}
-
-    filters["state"] = "published"
+        field_filters["author.name"] = {"$regex": re.escape(query_params.author), "$options": "i"}
 
     # Pagination values
     skip = query_params.start
-    limit = query_params.stop
+    limit = query_params.stop - query_params.start
 
-    # Call repo (repo must expose find-based search)
-    results = await search_blogs_repo(filters, skip=skip, limit=limit)
+    results = await search_blogs_repo(words, skip=skip, limit=limit, field_filters=field_filters)
 
     return ListOfBlogs(
         totalItems=len(results),